@@ -0,0 +1,46 @@
+"""
+Cold-start benchmark for gradio_app.py, suitable for CI.
+
+    python -m benchmarks.cold_start --runs 5 --json cold_start.json
+
+Each run spawns the app in probe mode (see utils/startup.py) and records the time from
+process spawn to the first served page. Exits 1 when the median exceeds the budget
+(FIN_AGENT_STARTUP_BUDGET or --budget).
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+
+from utils.startup import STARTUP_BUDGET, format_report, profile_startup
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "gradio_app.py")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="gradio_app time-to-first-render benchmark")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--budget", type=float, default=STARTUP_BUDGET, help="Seconds to first render")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args(argv)
+
+    runs = [profile_startup(APP) for _ in range(args.runs)]
+    median = statistics.median(run["first_render_s"] for run in runs)
+    slowest = max(runs, key=lambda run: run["first_render_s"])
+
+    print(format_report({**slowest, "budget_s": args.budget}))
+    print(f"\nmedian time to first render over {args.runs} runs: {median:.2f}s (budget {args.budget:.1f}s)")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"median_first_render_s": median, "budget_s": args.budget, "runs": runs}, f, indent=2)
+
+    if median > args.budget:
+        print("Over budget")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+Load time and resident memory of the pickled docstore (FAISS.save_local) versus the
+memory-mapped chunk store in rag/docstore.py.
+
+    python -m benchmarks.docstore --chunks 20000
+
+Both layouts are built from the same synthetic corpus and random vectors. Each load is
+measured in a fresh interpreter so RSS only reflects that one index.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+from benchmarks.fakes import _STORIES
+
+DIMENSIONS = 384  # all-MiniLM-L6-v2
+
+_LOAD_SCRIPT = """
+import json, os, resource, sys, time
+
+def rss_mb():
+    # Current RSS on Linux; elsewhere fall back to the peak (KiB on Linux, bytes on macOS)
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+from langchain_core.embeddings import FakeEmbeddings
+from langchain_community.vectorstores import FAISS
+from rag.docstore import load_index
+
+layout, path, k = sys.argv[1], sys.argv[2], int(sys.argv[3])
+embeddings = FakeEmbeddings(size={dims})
+before = rss_mb()
+start = time.perf_counter()
+if layout == "pickle":
+    db = FAISS.load_local(path, embeddings, allow_dangerous_deserialization=True)
+else:
+    db = load_index(path, embeddings)
+load_s = time.perf_counter() - start
+after_load = rss_mb()
+
+start = time.perf_counter()
+for _ in range(20):
+    db.similarity_search("quarterly profit", k=k)
+search_ms = (time.perf_counter() - start) / 20 * 1000
+print(json.dumps({{"load_s": load_s, "rss_mb": after_load - before, "search_ms": search_ms}}))
+"""
+
+
+def build(directory: str, chunks: int) -> dict:
+    import faiss
+    from langchain_core.embeddings import FakeEmbeddings
+    from langchain_community.vectorstores import FAISS
+    from rag.docstore import save_index
+
+    texts = []
+    for i in range(chunks):
+        title, body = _STORIES[i % len(_STORIES)]
+        texts.append(f"{title} #{i}. " + body * (2 + i % 4))
+    metadatas = [{"file_path": f"data/finance_resources/book_{i % 40}.pdf", "length": len(t)}
+                 for i, t in enumerate(texts)]
+    vectors = np.random.default_rng(0).standard_normal((chunks, DIMENSIONS)).astype(np.float32)
+
+    pickle_dir = os.path.join(directory, "pickle.index")
+    db = FAISS.from_embeddings(zip(texts, vectors.tolist()), FakeEmbeddings(size=DIMENSIONS), metadatas=metadatas)
+    db.save_local(pickle_dir)
+
+    chunk_dir = os.path.join(directory, "chunks.index")
+    index = faiss.IndexFlatL2(DIMENSIONS)
+    index.add(vectors)
+    save_index(chunk_dir, index, texts, metadatas)
+
+    def size(path):
+        # Everything but the vectors, which are identical in both layouts
+        return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path) if f != "index.faiss") / 1e6
+
+    return {"pickle": (pickle_dir, size(pickle_dir)), "chunks": (chunk_dir, size(chunk_dir))}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pickled docstore vs memory-mapped chunk store")
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with tempfile.TemporaryDirectory() as directory:
+        layouts = build(directory, args.chunks)
+        print(f"{'layout':<8} {'docstore MB':>11} {'load s':>8} {'RSS +MB':>8} {'search ms':>10}")
+        for layout, (path, size_mb) in layouts.items():
+            output = subprocess.run(
+                [sys.executable, "-c", _LOAD_SCRIPT.format(dims=DIMENSIONS), layout, path, str(args.k)],
+                cwd=root, capture_output=True, text=True, check=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{layout:<8} {size_mb:>11.1f} {result['load_s']:>8.3f} {result['rss_mb']:>8.1f} "
+                  f"{result['search_ms']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
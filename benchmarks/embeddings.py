@@ -0,0 +1,119 @@
+"""
+Parity and throughput of the embedding backends in rag/embeddings.py.
+
+    python -m benchmarks.embeddings
+    python -m benchmarks.embeddings --backends torch onnx-int8 --threads 8
+
+Parity is the cosine similarity between each backend's vectors and the PyTorch
+reference for the same texts. Throughput covers query time (single-query latency
+and concurrent queries, which exercise dynamic batching) and ingestion
+(embed_documents over chunk-sized texts).
+"""
+import argparse
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from benchmarks.fakes import _STORIES
+from rag.embeddings import ONNX_FILES, get_embeddings
+
+MIN_COSINE = {"onnx": 0.999, "onnx-int8": 0.98}  # Parity floors against torch
+
+QUERIES = [
+    "What is volatility?", "Explain P/E ratio", "How do index funds work?",
+    "What caused the 2008 financial crisis?", "How to read a balance sheet",
+    "Turtle trading rules for position sizing", "What is a moat according to Buffett?",
+    "Difference between RSI and MACD",
+]
+
+
+def _documents(count: int) -> list:
+    # Chunk-sized passages of varying length, like the ingestion path produces
+    texts = []
+    for i in range(count):
+        title, body = _STORIES[i % len(_STORIES)]
+        texts.append(f"{title}. " + body * (1 + i % 5))
+    return texts
+
+
+def _cosines(reference: np.ndarray, other: np.ndarray) -> np.ndarray:
+    reference = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    other = other / np.linalg.norm(other, axis=1, keepdims=True)
+    return (reference * other).sum(axis=1)
+
+
+def bench_backend(backend: str, documents: list, threads: int, repeats: int) -> dict:
+    started = time.perf_counter()
+    embeddings = get_embeddings(backend)
+    load_seconds = time.perf_counter() - started
+
+    embeddings.embed_query("warm up")
+    single = []
+    for _ in range(repeats):
+        for query in QUERIES:
+            start = time.perf_counter()
+            embeddings.embed_query(query)
+            single.append(time.perf_counter() - start)
+
+    concurrent_queries = QUERIES * repeats * 4
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        start = time.perf_counter()
+        list(pool.map(embeddings.embed_query, concurrent_queries))
+        concurrent_qps = len(concurrent_queries) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    document_vectors = np.array(embeddings.embed_documents(documents))
+    docs_per_sec = len(documents) / (time.perf_counter() - start)
+
+    query_vectors = np.array([embeddings.embed_query(q) for q in QUERIES])
+    return {
+        "backend": backend,
+        "load_s": load_seconds,
+        "query_p50_ms": statistics.median(single) * 1000,
+        "concurrent_qps": concurrent_qps,
+        "docs_per_sec": docs_per_sec,
+        "vectors": np.vstack([query_vectors, document_vectors]),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Embedding backend parity and throughput")
+    parser.add_argument("--backends", nargs="+", default=["torch", *ONNX_FILES])
+    parser.add_argument("--documents", type=int, default=256)
+    parser.add_argument("--threads", type=int, default=8, help="Concurrent query threads")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    documents = _documents(args.documents)
+    results = {}
+    for backend in args.backends:
+        try:
+            results[backend] = bench_backend(backend, documents, args.threads, args.repeats)
+        except Exception as e:
+            print(f"{backend}: skipped ({type(e).__name__}: {e})")
+
+    print(f"{'backend':<10} {'load s':>7} {'query p50 ms':>12} {'concurrent q/s':>14} {'docs/s':>8} {'min cos':>8} {'mean cos':>8}")
+    failed = False
+    reference = results.get("torch")
+    for backend, result in results.items():
+        min_cos = mean_cos = float("nan")
+        if reference is not None:
+            cosines = _cosines(reference["vectors"], result["vectors"])
+            min_cos, mean_cos = cosines.min(), cosines.mean()
+            if min_cos < MIN_COSINE.get(backend, 0.999):
+                failed = True
+        print(f"{backend:<10} {result['load_s']:>7.2f} {result['query_p50_ms']:>12.2f} "
+              f"{result['concurrent_qps']:>14.1f} {result['docs_per_sec']:>8.1f} {min_cos:>8.4f} {mean_cos:>8.4f}")
+
+    if reference is None:
+        print("No torch reference; parity not checked")
+    elif failed:
+        print("Parity check FAILED")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,305 @@
+"""
+Deterministic local stand-ins for Ollama, Yahoo Finance and DuckDuckGo.
+
+`FakeOllamaServer` is a real HTTP server speaking enough of Ollama's API for the app,
+with configurable latency and token rates. `install_fakes` points the app modules at it
+and swaps yfinance, DDGS and newspaper for canned data so benchmarks run offline.
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import types
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+ROUTER_REPLY = json.dumps({
+    "needs_retrieval": True,
+    "tools_needed": ["financial_retriever", "web_search"],
+    "financial_query": "price to earnings ratio valuation",
+    "search_query": "company quarterly results news",
+})
+SUMMARY_REPLY = " Revenue grew 12% year on year on strong demand\n• Margins narrowed on higher input costs"
+CHAT_REPLY = ("Volatility measures how much a stock's price moves around its average. "
+              "Higher volatility means larger swings and usually higher risk.")
+
+
+def count_tokens(text: str) -> int:
+    """Rough llama tokenizer stand-in: ~4 characters per token"""
+    return max(1, len(text) // 4)
+
+
+def render_chat(messages) -> str:
+    """Flatten chat messages the way a chat template would"""
+    return "".join(f"<|{m.get('role', 'user')}|>{m.get('content', '')}<|end|>" for m in messages)
+
+
+class FakeOllamaServer:
+    """
+    Mimics Ollama's /api/generate and /api/chat with a fixed base latency, a prefill
+    rate for the prompt and a decode rate for the reply. Durations are reported in the
+    same nanosecond fields Ollama uses.
+
+    With `prefix_cache` on, it emulates a single KV-cache slot: only the part of the
+    prompt after the prefix shared with the previous request is charged as prefill.
+    """
+
+    def __init__(self, latency: float = 0.05, prefill_tokens_per_sec: float = 2000.0,
+                 tokens_per_sec: float = 200.0, prefix_cache: bool = True,
+                 host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency
+        self.prefill_tokens_per_sec = prefill_tokens_per_sec
+        self.tokens_per_sec = tokens_per_sec
+        self.prefix_cache = prefix_cache
+        self.requests = []
+        self._cached_prompt = ""
+        self._cache_lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeOllamaServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reply_for(self, prompt: str) -> str:
+        if "Respond EXACTLY with this JSON" in prompt:
+            return ROUTER_REPLY
+        if "Extracted Financial Points" in prompt:
+            return SUMMARY_REPLY
+        return CHAT_REPLY
+
+    def prompt_tokens_to_prefill(self, prompt: str) -> int:
+        if not self.prefix_cache:
+            return count_tokens(prompt)
+        with self._cache_lock:
+            shared = os.path.commonprefix([self._cached_prompt, prompt])
+            self._cached_prompt = prompt
+        return max(1, count_tokens(prompt) - len(shared) // 4)
+
+    def generate(self, prompt: str) -> dict:
+        reply = self.reply_for(prompt)
+        prompt_tokens = count_tokens(prompt)
+        prefill_tokens = self.prompt_tokens_to_prefill(prompt)
+        reply_tokens = count_tokens(reply)
+
+        prefill = prefill_tokens / self.prefill_tokens_per_sec
+        decode = reply_tokens / self.tokens_per_sec
+        time.sleep(self.latency + prefill + decode)
+
+        self.requests.append({"prompt_tokens": prompt_tokens, "prefill_tokens": prefill_tokens})
+        return {
+            "reply": reply,
+            "prompt_eval_count": prefill_tokens,  # Like Ollama, only tokens actually evaluated
+            "eval_count": reply_tokens,
+            "load_duration": 0,
+            "prompt_eval_duration": int(prefill * 1e9),
+            "eval_duration": int(decode * 1e9),
+            "total_duration": int((self.latency + prefill + decode) * 1e9),
+        }
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if self.path == "/api/generate":
+                    result = fake.generate(body.get("prompt", ""))
+                    payload = {"model": body.get("model"), "response": result.pop("reply"), "done": True, **result}
+                elif self.path == "/api/chat":
+                    result = fake.generate(render_chat(body.get("messages", [])))
+                    payload = {"model": body.get("model"), "done": True,
+                               "message": {"role": "assistant", "content": result.pop("reply")}, **result}
+                else:
+                    self.send_error(404)
+                    return
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+# Canned news: two syndicated copies of the same story plus distinct ones,
+# so the dedup stage has something to do.
+_STORIES = [
+    ("Quarterly profit rises 12% on strong retail demand",
+     "The company reported a 12 percent rise in consolidated net profit for the quarter, helped by "
+     "strong demand in its retail and digital services businesses. Revenue from operations grew "
+     "9 percent while operating margins narrowed slightly on higher input costs. "),
+    ("Board approves capex plan for new energy business",
+     "The board approved a multi-year capital expenditure plan for the new energy unit, including "
+     "solar module manufacturing and battery storage. Analysts expect the investments to weigh on "
+     "free cash flow in the near term but support long-term growth. "),
+    ("Brokerages raise target price after results",
+     "Several brokerages raised their target price on the stock after the results beat street "
+     "estimates. Most maintained buy ratings citing earnings visibility and a strong balance sheet. "),
+]
+
+
+def _news_results(query: str, max_results: int) -> list:
+    results = []
+    for i, (title, _) in enumerate(_STORIES):
+        results.append({"title": title, "url": f"https://news.example.com/story/{i}",
+                        "body": title, "date": "2025-01-15T09:00:00", "source": "Example News"})
+    # Syndicated copy of the first story on another site
+    results.append({"title": _STORIES[0][0] + " - Wire", "url": "https://wire.example.org/a/0",
+                    "body": _STORIES[0][0], "date": "2025-01-15T09:05:00", "source": "Wire"})
+    return results[:max_results]
+
+
+class FakeDDGS:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def text(self, query, max_results=10, **kwargs):
+        return [{"title": r["title"], "href": r["url"], "body": r["body"]} for r in _news_results(query, max_results)]
+
+    def news(self, keywords, max_results=10, **kwargs):
+        return _news_results(keywords, max_results)
+
+
+class FakeArticle:
+    """newspaper.Article stand-in returning canned text for the example URLs"""
+
+    def __init__(self, url, config=None):
+        self.url = url
+        self.title = ""
+        self.text = ""
+        self.publish_date = None
+        self.authors = []
+
+    def download(self):
+        pass
+
+    def parse(self):
+        index = int(self.url.rstrip("/").rsplit("/", 1)[-1]) % len(_STORIES)
+        title, text = _STORIES[index]
+        self.title = title
+        self.text = text * 4
+        self.publish_date = datetime(2025, 1, 15, 9, 0)
+        self.authors = ["Staff Reporter"]
+
+
+def load_price_frame(ticker: str, start: str, end: str) -> pd.DataFrame:
+    """Recorded OHLCV frame for `ticker` if one exists, else a seeded random walk"""
+    path = os.path.join(FIXTURE_DIR, f"{ticker}.csv")
+    if os.path.exists(path):
+        frame = pd.read_csv(path, index_col=0, parse_dates=True)
+        return frame.loc[start:end]
+
+    dates = pd.bdate_range(start=start, end=end)
+    rng = np.random.default_rng(sum(map(ord, ticker)))  # Stable across runs, unlike hash()
+    close = 1000 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, len(dates))))
+    spread = np.abs(rng.normal(0, 0.01, len(dates))) * close
+    return pd.DataFrame({
+        "Open": close * (1 + rng.normal(0, 0.003, len(dates))),
+        "High": close + spread,
+        "Low": close - spread,
+        "Close": close,
+        "Volume": rng.integers(100_000, 5_000_000, len(dates)),
+    }, index=dates)
+
+
+FAKE_FUNDAMENTALS = {
+    "trailingPE": 24.5, "trailingEps": 98.2, "marketCap": 1.9e13,
+    "priceToBook": 2.3, "dividendYield": 0.0035, "beta": 0.95,
+}
+
+
+class FakeTicker:
+    def __init__(self, ticker):
+        self.ticker = ticker
+        self.info = dict(FAKE_FUNDAMENTALS)
+
+
+fake_yfinance = types.SimpleNamespace(
+    download=lambda ticker, start=None, end=None, progress=False, **kwargs: load_price_frame(ticker, start, end),
+    Ticker=FakeTicker,
+)
+
+
+class _Patcher:
+    def __init__(self):
+        self._saved = []
+
+    def set(self, obj, attr, value):
+        self._saved.append((obj, attr, getattr(obj, attr)))
+        setattr(obj, attr, value)
+
+    def restore(self):
+        for obj, attr, value in reversed(self._saved):
+            setattr(obj, attr, value)
+        self._saved.clear()
+
+
+@contextmanager
+def install_fakes(ollama: FakeOllamaServer):
+    """Point the app at `ollama` and replace network-bound modules with canned data"""
+    from utils.ollama import model
+    import data.stockdata as stockdata
+    import tools.search_online as search_online
+    import utils.summarization as summarization
+
+    cache_dir = tempfile.mkdtemp(prefix="fin-agent-bench-")
+    patcher = _Patcher()
+    try:
+        patcher.set(model, "base_url", f"{ollama.url}/api/generate")
+        patcher.set(model, "chat_url", f"{ollama.url}/api/chat")
+        patcher.set(search_online, "ddgs", FakeDDGS())
+        patcher.set(search_online, "Article", FakeArticle)
+        # search_ddg* sleep 30s to stay under DDG rate limits; there is nothing to limit here
+        patcher.set(search_online, "time", types.SimpleNamespace(sleep=lambda seconds: None))
+        patcher.set(stockdata, "yf", fake_yfinance)
+        patcher.set(summarization, "SUMMARY_CACHE_DIR", cache_dir)
+        yield
+    finally:
+        patcher.restore()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+def record_fixtures(tickers, start: str, end: str) -> None:
+    """Record real yfinance frames into FIXTURE_DIR (needs network)"""
+    import yfinance as yf
+
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    for ticker in tickers:
+        frame = yf.download(ticker, start=start, end=end, progress=False)
+        if isinstance(frame.columns, pd.MultiIndex):
+            frame.columns = frame.columns.get_level_values(0)
+        frame.to_csv(os.path.join(FIXTURE_DIR, f"{ticker}.csv"))
+        print(f"Recorded {len(frame)} rows for {ticker}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record yfinance fixtures for the benchmarks")
+    parser.add_argument("tickers", nargs="+")
+    parser.add_argument("--start", default="2023-01-01")
+    parser.add_argument("--end", default="2025-01-01")
+    args = parser.parse_args()
+    record_fixtures(args.tickers, args.start, args.end)
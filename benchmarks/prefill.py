@@ -0,0 +1,145 @@
+"""
+Prefill time per turn over a multi-turn chat, old prompt layout vs. the current one.
+
+    python -m benchmarks.prefill              # against the fake Ollama (KV cache emulated)
+    python -m benchmarks.prefill --live       # against the local Ollama server
+
+"legacy" reproduces the old ChatAgent: per-turn context inside the system prompt and
+the whole conversation flattened into one /api/generate prompt. "chat" is the current
+ChatAgent: static system prompt, context next to the newest question, /api/chat.
+
+A second session runs the chat layout with a small num_ctx until the conversation
+outgrows it, and checks every request still fits and still carries the company data
+(Ollama would otherwise truncate the oldest turns, including the one holding it).
+"""
+import argparse
+import sys
+
+from benchmarks.fakes import FakeOllamaServer, count_tokens, install_fakes, render_chat
+
+QUESTIONS = [
+    "What is the current price trend?", "Is the RSI signalling anything?",
+    "How does the P/E compare to the sector?", "What did the latest results say?",
+    "Is the dividend yield attractive?", "What is the beta telling us?",
+    "Summarise the recent news.", "Any risks from the capex plan?",
+]
+FINANCE_CONTEXT = ("**Price Analysis**\n- Current Price: $2890.10\n- 52W High: $3217.90\n- 52W Low: $2220.30\n"
+                   "**Technical Indicators**\n- SMA 50: $2950.44\n- SMA 200: $2801.12\n- RSI: 44.3\n"
+                   "**Fundamental Metrics**\n- PE RATIO: 24.5\n- MARKET CAP: $19.3B\n- PB RATIO: 2.30")
+NEWS_ITEM = "- Brokerages raise target price after results\n  Source: https://news.example.com/story/{i}\n  Excerpt: Several brokerages raised their target..."
+
+LEGACY_SYSTEM_PROMPT = """
+        You are a finance expert analyzing Indian companies. Answer questions factually.
+        Use provided data if available, otherwise use general knowledge.
+        Do NOT give personalized advice.
+        Be Concise.
+        Company: {company}
+        Financial Data: {finance}
+        News: {news}
+        """
+
+
+def _turn_context(turn: int) -> dict:
+    # The chat handler appends web results to the news context on tool-using turns
+    news = "\n".join(NEWS_ITEM.format(i=i) for i in range(turn // 2 + 1))
+    return {"finance": FINANCE_CONTEXT, "news": news}
+
+
+def run_session(layout: str, turns: int, company: str) -> list:
+    from core.chat_agent import ChatAgent
+    from utils.metrics import trace
+    from utils.ollama import model
+
+    agent = ChatAgent(model)
+    history = []
+    stats = []
+    for turn in range(turns):
+        question = QUESTIONS[turn % len(QUESTIONS)]
+        context = _turn_context(turn)
+        with trace("prefill_turn") as record:
+            if layout == "chat":
+                agent.generate_response(question, company, context)
+            else:
+                system_prompt = LEGACY_SYSTEM_PROMPT.format(company=company, **context)
+                messages = [{"role": "system", "content": system_prompt}, *history,
+                            {"role": "user", "content": question}]
+                reply = model.invoke(messages)
+                history.extend([{"role": "user", "content": question}, {"role": "assistant", "content": reply}])
+
+        calls = record.get("ollama") or [{}]
+        stats.append({
+            "turn": turn + 1,
+            "prompt_tokens": calls[-1].get("prompt_eval_count") or 0,
+            "prefill_ms": (calls[-1].get("prompt_eval_duration") or 0) / 1e6,
+        })
+    return stats
+
+
+def check_context_window(turns: int, company: str, num_ctx: int, reply_tokens: int) -> bool:
+    """Chat past num_ctx; True if every request fit and included the Financial Data block"""
+    from core.chat_agent import ChatAgent, SYSTEM_PROMPT
+    from utils.ollama import model
+
+    saved = model.num_ctx, model.max_tokens
+    model.num_ctx, model.max_tokens = num_ctx, reply_tokens
+    agent = ChatAgent(model)
+    ok, trims, largest, oldest = True, 0, 0, None
+    try:
+        for turn in range(turns):
+            agent.generate_response(QUESTIONS[turn % len(QUESTIONS)], company, _turn_context(turn))
+            sent = [{"role": "system", "content": SYSTEM_PROMPT}, *agent.history[:-1]]
+            tokens = count_tokens(render_chat(sent))
+            has_data = any("Financial Data:" in m["content"] for m in sent if m["role"] == "user")
+            largest = max(largest, tokens)
+            if oldest is not None and agent.history[0] is not oldest:
+                trims += 1
+            oldest = agent.history[0]
+            if tokens + reply_tokens > num_ctx or not has_data:
+                ok = False
+                print(f"turn {turn + 1}: {tokens} prompt tokens, company data {'present' if has_data else 'MISSING'}")
+    finally:
+        model.num_ctx, model.max_tokens = saved
+
+    print(f"num_ctx {num_ctx}: {turns} turns, history trimmed on {trims} turns, "
+          f"largest prompt {largest} tokens + {reply_tokens} reply -> {'ok' if ok else 'FAILED'}")
+    return ok
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-turn prefill time, legacy vs chat layout")
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--company", default="Reliance Industries Limited (NSE)")
+    parser.add_argument("--live", action="store_true", help="Use the real Ollama server")
+    parser.add_argument("--prefill-rate", type=float, default=400.0, help="Fake prompt tokens/s")
+    parser.add_argument("--small-ctx", type=int, default=1024, help="num_ctx for the overflow session")
+    parser.add_argument("--overflow-turns", type=int, default=40)
+    args = parser.parse_args(argv)
+
+    def sessions():
+        results = {layout: run_session(layout, args.turns, args.company) for layout in ("legacy", "chat")}
+        fits = check_context_window(args.overflow_turns, args.company, args.small_ctx, reply_tokens=256)
+        return results, fits
+
+    if args.live:
+        results, fits = sessions()
+    else:
+        ollama = FakeOllamaServer(latency=0.0, prefill_tokens_per_sec=args.prefill_rate,
+                                  tokens_per_sec=10_000).start()
+        try:
+            with install_fakes(ollama):
+                results, fits = sessions()
+        finally:
+            ollama.stop()
+
+    print(f"{'turn':>4} | {'legacy tokens':>13} {'prefill ms':>10} | {'chat tokens':>11} {'prefill ms':>10}")
+    for legacy, chat in zip(results["legacy"], results["chat"]):
+        print(f"{legacy['turn']:>4} | {legacy['prompt_tokens']:>13} {legacy['prefill_ms']:>10.1f} | "
+              f"{chat['prompt_tokens']:>11} {chat['prefill_ms']:>10.1f}")
+    for layout, stats in results.items():
+        total = sum(s["prefill_ms"] for s in stats)
+        print(f"{layout:>6}: total prefill {total:.0f} ms, last turn {stats[-1]['prefill_ms']:.0f} ms")
+    return 0 if fits else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+"""
+Offline end-to-end benchmarks.
+
+Run from the repository root:
+
+    python -m benchmarks.run --iterations 20
+    python -m benchmarks.run --only fetch_data handle_chat --json bench.json
+
+Ollama, yfinance, DuckDuckGo and article downloads are replaced by the fakes in
+benchmarks/fakes.py, so results only move when our own code does.
+"""
+import argparse
+import gc
+import json
+import resource
+import shutil
+import statistics
+import sys
+import time
+import tracemalloc
+
+from benchmarks.fakes import FakeOllamaServer, install_fakes, _STORIES
+
+BENCH_COMPANY_INDEX = 0  # First company in the NSE list
+BENCH_START_DATE = "2023-01-01"
+BENCH_END_DATE = "2024-12-31"
+CHAT_QUESTION = "What is volatility and how has the stock moved recently?"
+RETRIEVAL_QUERY = "price to earnings ratio valuation"
+
+_instance_caches = []  # Caches owned by objects a benchmark built, e.g. the chat answer cache
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _clear_caches():
+    """Drop in-process and on-disk caches so every iteration does the full work"""
+    import utils.summarization as summarization
+    from data.stockdata import fetch_financial_data
+    from tools.search_online import search_ddg, search_ddg_news
+    from tools.decision import cached_tool_decision
+
+    for cached in (fetch_financial_data, search_ddg, search_ddg_news, cached_tool_decision):
+        cached.cache_clear()
+    shutil.rmtree(summarization.SUMMARY_CACHE_DIR, ignore_errors=True)
+    for cache in _instance_caches:
+        cache.clear()
+
+
+def measure(name, setup, iterations, warm=False):
+    """Run the benchmark built by `setup` and report latency percentiles and memory"""
+    try:
+        state, fn = setup()
+    except Exception as e:
+        print(f"{name}: skipped ({type(e).__name__}: {e})")
+        return None
+
+    durations = []
+    try:
+        # Timed without tracemalloc, which slows allocation-heavy code considerably
+        for _ in range(iterations):
+            if not warm:
+                _clear_caches()
+            gc.collect()
+            start = time.perf_counter()
+            fn(state)
+            durations.append(time.perf_counter() - start)
+
+        # One extra pass just for peak allocations
+        if not warm:
+            _clear_caches()
+        gc.collect()
+        tracemalloc.start()
+        try:
+            fn(state)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    except Exception as e:
+        print(f"{name}: failed ({type(e).__name__}: {e})")
+        return None
+
+    result = {
+        "name": name,
+        "iterations": iterations,
+        "p50_ms": _percentile(durations, 50) * 1000,
+        "p95_ms": _percentile(durations, 95) * 1000,
+        "mean_ms": statistics.fmean(durations) * 1000,
+        "peak_alloc_mb": peak / 2 ** 20,
+        # ru_maxrss is KiB on Linux
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+    print(f"{name:<18} p50 {result['p50_ms']:9.1f} ms   p95 {result['p95_ms']:9.1f} ms   "
+          f"peak alloc {result['peak_alloc_mb']:7.1f} MB   rss {result['max_rss_mb']:7.1f} MB")
+    if isinstance(state, int):
+        # Throughput benchmarks pass their item count as state
+        result["items_per_sec"] = state / (result["p50_ms"] / 1000)
+        print(f"{'':<18} {result['items_per_sec']:.1f} items/s")
+    return result
+
+
+def bench_fetch_data():
+    from data.stockdata import fetch_data, market
+
+    company = market.company_list[BENCH_COMPANY_INDEX]
+    return company, lambda c: fetch_data(c, BENCH_START_DATE, BENCH_END_DATE)
+
+
+def bench_handle_chat():
+    from gradio_app import FinanceInterface
+
+    interface = FinanceInterface()
+    company = interface.market.company_list[BENCH_COMPANY_INDEX]
+    # Every iteration resets the context, so a kept answer would be an exact-match hit
+    _instance_caches.append(interface.answer_cache)
+
+    def run(_):
+        interface.agent.history.clear()
+        interface.context = {"finance": "", "news": ""}
+        return interface._answer(CHAT_QUESTION, [], company)
+
+    return None, run
+
+
+def bench_retrieve_context():
+    from rag.rag_pipeline import RETRIEVAL_URL, _local_db, retrieve_context
+
+    if not RETRIEVAL_URL:
+        _local_db()  # A missing model or index skips the benchmark instead of failing every run
+    return None, lambda _: retrieve_context(RETRIEVAL_QUERY)
+
+
+def bench_ingestion():
+    from langchain_community.vectorstores import FAISS
+    from langchain_community.embeddings import SentenceTransformerEmbeddings
+    from rag.embed_documents import compute_hash
+
+    embeddings = SentenceTransformerEmbeddings(model_name="all-MiniLM-L6-v2")
+    documents = [text * 20 for _, text in _STORIES] * 20
+
+    def run(_):
+        metadata = [{"hash": compute_hash(doc), "length": len(doc)} for doc in documents]
+        FAISS.from_texts(texts=documents, embedding=embeddings, metadatas=metadata)
+
+    return len(documents), run
+
+
+BENCHMARKS = {
+    "fetch_data": bench_fetch_data,
+    "handle_chat": bench_handle_chat,
+    "retrieve_context": bench_retrieve_context,
+    "ingestion": bench_ingestion,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline fin-agent benchmarks")
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="Run a subset")
+    parser.add_argument("--warm", action="store_true", help="Keep caches between iterations")
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake Ollama base latency (s)")
+    parser.add_argument("--prefill-rate", type=float, default=2000.0, help="Fake prompt tokens/s")
+    parser.add_argument("--token-rate", type=float, default=200.0, help="Fake generated tokens/s")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args(argv)
+
+    ollama = FakeOllamaServer(latency=args.latency, prefill_tokens_per_sec=args.prefill_rate,
+                              tokens_per_sec=args.token_rate).start()
+    results = []
+    try:
+        with install_fakes(ollama):
+            for name in args.only or BENCHMARKS:
+                result = measure(name, BENCHMARKS[name], args.iterations, warm=args.warm)
+                if result:
+                    results.append(result)
+    finally:
+        ollama.stop()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0 if results else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,110 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+# Kept byte-identical across turns so Ollama can reuse the cached prefix
+SYSTEM_PROMPT = """
+        You are a finance expert analyzing Indian companies. Answer questions factually.
+        Use provided data if available, otherwise use general knowledge.
+        Do NOT give personalized advice.
+        Be Concise.
+        Company data and news arrive inside user messages; the most recent values are current.
+        """
+
+CONTEXT_FIELDS = [("finance", "Financial Data", "No data"), ("news", "News", "No news")]
+
+DEFAULT_NUM_CTX = 8192  # Ollama context window, when the model doesn't say
+DEFAULT_REPLY_TOKENS = 1000
+CHARS_PER_TOKEN = 3  # Conservative; numbers and tables tokenize worse than prose
+MESSAGE_OVERHEAD_TOKENS = 8  # Chat template tokens around each message
+
+
+def estimate_tokens(messages: List[Dict[str, str]]) -> int:
+    return sum(len(m["content"]) // CHARS_PER_TOKEN + MESSAGE_OVERHEAD_TOKENS for m in messages)
+
 
 class ChatAgent:
     """Minimal chat agent for Llama 3.2 on Ollama"""
-    
+
     def __init__(self, model: Any):
-        self.model = model  # Ollama model with .invoke()
-        self.history: List[Dict[str, str]] = []  # Stores {role, content} pairs
+        self.model = model  # Ollama model with .chat() (or .invoke())
+        self.history: List[Dict[str, str]] = []  # Stores {role, content} pairs, exactly as sent
+        self._sent_context: Optional[Dict[str, str]] = None  # Context already present in history
+
+    def _prompt_budget(self) -> int:
+        """Prompt tokens that fit in the model's context window next to a full reply"""
+        num_ctx = getattr(self.model, "num_ctx", DEFAULT_NUM_CTX)
+        return num_ctx - getattr(self.model, "max_tokens", DEFAULT_REPLY_TOKENS)
+
+    def _context_block(self, company: str, current: Dict[str, str], previous: Optional[Dict[str, str]]) -> str:
+        """
+        Context to attach to this turn: everything on the first turn, after a company
+        switch or after old turns were dropped, otherwise only what changed. The chat
+        handler appends to the context, so a change is usually just a new suffix.
+        """
+        if previous is None or previous["company"] != current["company"]:
+            lines = [f"Company: {current['company']}"]
+            lines += [f"{label}: {current[key]}" for key, label, _ in CONTEXT_FIELDS]
+            return "\n".join(lines)
+
+        lines = []
+        for key, label, _ in CONTEXT_FIELDS:
+            old, new = previous[key], current[key]
+            if new == old:
+                continue
+            if old and new.startswith(old):
+                lines.append(f"{label} (new): {new[len(old):].strip()}")
+            else:
+                lines.append(f"{label}: {new}")
+        return "\n".join(lines)
+
+    def checkpoint(self) -> tuple:
+        """State for rollback() to undo the turns added after this point"""
+        return self.history, self._sent_context
+
+    def rollback(self, checkpoint: tuple) -> None:
+        self.history, self._sent_context = checkpoint
+
+    def build_messages(
+        self,
+        user_message: str,
+        company: str,
+        context: Dict[str, str],
+    ) -> List[Dict[str, str]]:
+        """
+        Layout: static system prompt, prior turns as they were sent, then the new question
+        with any context changes in front of it. Each request only appends to the previous
+        one, so Ollama re-prefills just the last answer and the new turn.
+
+        Once the conversation would outgrow num_ctx, the oldest turns are dropped here
+        (Ollama would otherwise truncate them itself, losing the turn that carried the
+        company data) and the full context is sent again with the new question. If even
+        that does not fit, the oldest news is cut; the web results appended last are kept.
+        """
+        current = {"company": company}
+        current.update({key: context.get(key, default) for key, _, default in CONTEXT_FIELDS})
+        previous = self._sent_context if self.history else None
+        self._sent_context = current
+
+        def turn(block: str) -> Dict[str, str]:
+            content = f"{block}\n\nQuestion: {user_message}" if block else user_message
+            return {"role": "user", "content": content}
+
+        system = {"role": "system", "content": SYSTEM_PROMPT}
+        history = self.history
+        message = turn(self._context_block(company, current, previous))
+        budget = self._prompt_budget()
+        if history and estimate_tokens([system, *history, message]) > budget:
+            message = turn(self._context_block(company, current, None))
+            while history and estimate_tokens([system, *history, message]) > budget:
+                history = history[2:]  # Oldest user/assistant pair
+
+        overflow = estimate_tokens([system, *history, message]) - budget
+        if overflow > 0:
+            # The context alone outgrows the window: keep the data, drop the oldest news
+            news = current["news"]
+            clipped = dict(current, news="..." + news[(overflow + 1) * CHARS_PER_TOKEN + 3:])
+            message = turn(self._context_block(company, clipped, None))
+
+        return [system, *history, message]
 
     def generate_response(
         self,
@@ -14,40 +113,37 @@ class ChatAgent:
         context: Dict[str, str],
     ) -> Dict[str, Any]:
         """
-        Generates a response using Ollama's .invoke().
+        Generates a response using Ollama's /api/chat.
         Input/Output matches original:
         - Input: `user_message`, `company`, `context` (keys: finance/news)
         - Output: `{"text": "model_reply"}`
         """
-        # Format system prompt (static instructions)
-        system_prompt = """
-        You are a finance expert analyzing Indian companies. Answer questions factually.
-        Use provided data if available, otherwise use general knowledge.
-        Do NOT give personalized advice.
-        Be Concise.
-        Company: {company}
-        Financial Data: {finance}
-        News: {news}
-        """.format(
-            company=company,
-            finance=context.get("finance", "No data"),
-            news=context.get("news", "No news"),
-        )
-
-         # Build messages for Ollama (system + history + new question)
-        messages = [
-            {"role": "system", "content": system_prompt},
-            *self.history,  # Previous turns
-            {"role": "user", "content": user_message},
-        ]
-
-        # Call Llama 3.2 via Ollama (using .invoke())
-        response = self.model.invoke(messages)
-
-        # Update history (Ollama-style dicts)
-        self.history.extend([
-            {"role": "user", "content": user_message},
-            {"role": "assistant", "content": response},
-        ])
+        sent_context = self._sent_context
+        messages = self.build_messages(user_message, company, context)
+
+        try:
+            if hasattr(self.model, "chat"):
+                response = self.model.chat(messages)
+            else:
+                response = self.model.invoke(messages)
+        except Exception:
+            # Nothing was added to the history, so the context was not sent either
+            self._sent_context = sent_context
+            raise
+
+        # Keep the turns exactly as sent (after any trimming) so the next request
+        # extends the cached prefix
+        self.history = messages[1:] + [{"role": "assistant", "content": response}]
 
         return {"text": response}
+
+    def record_turn(
+        self,
+        user_message: str,
+        company: str,
+        context: Dict[str, str],
+        response: str,
+    ) -> None:
+        """Add a turn answered elsewhere (e.g. from a cache) so follow-ups can refer to it."""
+        messages = self.build_messages(user_message, company, context)
+        self.history = messages[1:] + [{"role": "assistant", "content": response}]
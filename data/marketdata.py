@@ -4,8 +4,6 @@ import io
 import time
 import os
 from datetime import date
-from selenium import webdriver
-from splinter import Browser
 
 class MarketData:
     def __init__(self, data_dir='data/ticker_info'):
@@ -64,6 +62,10 @@ class MarketData:
         self.load_nse_data()
     
     def update_bse_list(self):
+        # Only needed when the BSE list is missing; keep the browser stack off the import path
+        from selenium import webdriver
+        from splinter import Browser
+
         bse_link = "https://bseindia.com/corporates/List_Scrips.html"
         
         options = webdriver.ChromeOptions()
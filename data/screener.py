@@ -0,0 +1,262 @@
+import argparse
+import os
+import re
+import threading
+import warnings
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Locally cached inputs; refresh with `python -m data.screener --refresh`
+SCREENER_CACHE_DIR = os.path.join("cache", "screener")
+PRICES_FILE = os.path.join(SCREENER_CACHE_DIR, "prices.npz")
+FUNDAMENTALS_FILE = os.path.join(SCREENER_CACHE_DIR, "fundamentals.csv")
+DOWNLOAD_BATCH_SIZE = 200
+DEFAULT_LIMIT = 25
+
+# Same yfinance fields (and units) as calculate_statistics in data/stockdata.py
+FUNDAMENTAL_FIELDS = {
+    'pe_ratio': 'trailingPE',
+    'eps': 'trailingEps',
+    'market_cap': 'marketCap',
+    'pb_ratio': 'priceToBook',
+    'dividend_yield': 'dividendYield',
+    'beta': 'beta'
+}
+
+# User-facing names accepted in filter expressions, longest match first
+ALIASES = {
+    "50d sma": "sma_50", "200d sma": "sma_200", "sma 50": "sma_50", "sma 200": "sma_200",
+    "sma50": "sma_50", "sma200": "sma_200", "52w high": "high_52w", "52w low": "low_52w",
+    "dividend yield": "dividend_yield", "market cap": "market_cap", "mcap": "market_cap",
+    "p/e": "pe_ratio", "pe": "pe_ratio", "p/b": "pb_ratio", "pb": "pb_ratio",
+    "price": "current_price", "close": "current_price", "volume": "volume_avg_20d",
+}
+
+COLUMNS = ["current_price", "high_52w", "low_52w", "sma_50", "sma_200", "rsi",
+           "volume_avg_20d", "volatility"] + list(FUNDAMENTAL_FIELDS)
+
+_TOKEN_RE = re.compile(r"\s*(?:(\d+\.?\d*(?:e[+-]?\d+)?)|([a-z_][a-z0-9_]*)|(<=|>=|==|!=|<|>|\(|\)|\+|-|\*|/))")
+_KEYWORDS = {"and", "or", "not"}
+
+_snapshot = None
+_snapshot_mtimes = None
+_snapshot_lock = threading.Lock()
+
+
+def refresh_prices(tickers: List[str], period: str = "1y") -> None:
+    """Download daily OHLCV for all tickers in batches and store them as dense matrices"""
+    import yfinance as yf
+
+    fields = {"Close": [], "High": [], "Low": [], "Volume": []}
+    for start in range(0, len(tickers), DOWNLOAD_BATCH_SIZE):
+        batch = tickers[start:start + DOWNLOAD_BATCH_SIZE]
+        try:
+            frame = yf.download(batch, period=period, group_by="column", progress=False, threads=True)
+        except Exception as e:
+            print(f"Error downloading batch starting at {batch[0]}: {e}")
+            continue
+        for field in fields:
+            if field in frame.columns.get_level_values(0):
+                fields[field].append(frame[field])
+
+    if not fields["Close"]:
+        print("No price data downloaded.")
+        return
+
+    wide = {field: pd.concat(parts, axis=1).sort_index() for field, parts in fields.items()}
+    close = wide["Close"]
+    symbols = close.columns.astype(str)
+    os.makedirs(SCREENER_CACHE_DIR, exist_ok=True)
+    np.savez(
+        PRICES_FILE,
+        symbols=np.array(symbols, dtype=str),
+        dates=close.index.values.astype("datetime64[D]"),
+        **{field.lower(): frame.reindex(index=close.index, columns=close.columns).to_numpy(dtype=np.float64)
+           for field, frame in wide.items()},
+    )
+    print(f"Saved prices for {len(symbols)} symbols x {len(close)} days to {PRICES_FILE}")
+
+
+def refresh_fundamentals(tickers: List[str]) -> None:
+    """Fetch fundamentals one ticker at a time (slow: one HTTP call per symbol)"""
+    import yfinance as yf
+
+    rows = []
+    for ticker in tickers:
+        try:
+            info = yf.Ticker(ticker).info
+        except Exception as e:
+            print(f"Error fetching fundamentals for {ticker}: {e}")
+            continue
+        rows.append({"symbol": ticker, **{stat: info.get(key) for stat, key in FUNDAMENTAL_FIELDS.items()}})
+
+    os.makedirs(SCREENER_CACHE_DIR, exist_ok=True)
+    pd.DataFrame(rows).to_csv(FUNDAMENTALS_FILE, index=False)
+    print(f"Saved fundamentals for {len(rows)} symbols to {FUNDAMENTALS_FILE}")
+
+
+def _window(matrix: np.ndarray, window: int, reducer) -> np.ndarray:
+    """Reduce the last `window` rows per column, NaN where the window is incomplete"""
+    tail = matrix[-window:]
+    with np.errstate(all="ignore"):
+        values = reducer(tail, axis=0)
+    complete = (tail.shape[0] == window) & (np.isnan(tail).sum(axis=0) == 0)
+    return np.where(complete, values, np.nan)
+
+
+def _nan_reduce(reducer, matrix: np.ndarray, **kwargs) -> np.ndarray:
+    """NaN-aware column reduction that quietly yields NaN for symbols with no data"""
+    with warnings.catch_warnings(), np.errstate(all="ignore"):
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return reducer(matrix, axis=0, **kwargs)
+
+
+def build_snapshot(prices: Dict[str, np.ndarray], fundamentals: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Compute the screener columns for every symbol at once from [days x symbols] matrices.
+    Indicators follow calculate_statistics in data/stockdata.py.
+    """
+    close, high, low, volume = prices["close"], prices["high"], prices["low"], prices["volume"]
+    # Symbols stop trading on different days; carry the last close forward
+    close = pd.DataFrame(close).ffill().to_numpy()
+
+    delta = np.diff(close[-15:], axis=0)
+    avg_gain = _window(np.where(delta > 0, delta, 0.0), 14, np.mean)
+    avg_loss = _window(np.where(delta < 0, -delta, 0.0), 14, np.mean)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = np.where(avg_loss == 0, 100.0, 100.0 - 100.0 / (1 + avg_gain / avg_loss))
+        returns = close[1:] / close[:-1] - 1
+
+    snapshot = pd.DataFrame({
+        "current_price": close[-1],
+        "high_52w": _nan_reduce(np.nanmax, high[-252:]),
+        "low_52w": _nan_reduce(np.nanmin, low[-252:]),
+        "sma_50": _window(close, 50, np.mean),
+        "sma_200": _window(close, 200, np.mean),
+        "rsi": np.where(np.isnan(avg_gain) | np.isnan(avg_loss), np.nan, rsi),
+        "volume_avg_20d": _window(volume, 20, np.mean),
+        "volatility": _nan_reduce(np.nanstd, returns, ddof=1) * 252 ** 0.5,
+    }, index=pd.Index(prices["symbols"], name="symbol"))
+
+    if fundamentals is not None and not fundamentals.empty:
+        fundamentals = fundamentals.set_index("symbol")
+        for stat in FUNDAMENTAL_FIELDS:
+            snapshot[stat] = pd.to_numeric(fundamentals[stat], errors="coerce").reindex(snapshot.index)
+        snapshot["dividend_yield"] *= 100
+        snapshot["market_cap"] /= 1e9
+    else:
+        for stat in FUNDAMENTAL_FIELDS:
+            snapshot[stat] = np.nan
+
+    return snapshot
+
+
+def load_snapshot() -> pd.DataFrame:
+    """Snapshot from the local cache, rebuilt only when the cache files change"""
+    global _snapshot, _snapshot_mtimes
+    if not os.path.exists(PRICES_FILE):
+        raise FileNotFoundError(f"No screener data at {PRICES_FILE}; run `python -m data.screener --refresh`")
+
+    mtimes = tuple(os.path.getmtime(p) if os.path.exists(p) else None for p in (PRICES_FILE, FUNDAMENTALS_FILE))
+    with _snapshot_lock:
+        if _snapshot is None or mtimes != _snapshot_mtimes:
+            with np.load(PRICES_FILE, allow_pickle=False) as data:
+                prices = {key: data[key] for key in data.files}
+            fundamentals = pd.read_csv(FUNDAMENTALS_FILE) if os.path.exists(FUNDAMENTALS_FILE) else None
+            _snapshot = build_snapshot(prices, fundamentals)
+            _snapshot_mtimes = mtimes
+        return _snapshot
+
+
+def compile_expression(expression: str) -> str:
+    """
+    Translate a filter like "RSI < 30 and PE < 15 and 50D SMA > 200D SMA" into a
+    pandas query over the snapshot columns. Only column names, numbers, comparisons,
+    arithmetic, parentheses and and/or/not are accepted.
+    """
+    text = expression.lower().strip()
+    for alias in sorted(ALIASES, key=len, reverse=True):
+        text = re.sub(rf"(?<![a-z0-9_]){re.escape(alias)}(?![a-z0-9_])", ALIASES[alias], text)
+    text = text.replace("&&", " and ").replace("||", " or ").replace("=<", "<=").replace("=>", ">=")
+
+    tokens = []
+    position = 0
+    while position < len(text):
+        match = _TOKEN_RE.match(text, position)
+        if not match or match.end() == position:
+            if text[position:].strip() == "":
+                break
+            raise ValueError(f"Unexpected input in screen expression near '{text[position:].strip()[:20]}'")
+        number, name, operator = match.groups()
+        if name and name not in COLUMNS and name not in _KEYWORDS:
+            raise ValueError(f"Unknown field '{name}'. Available: {', '.join(COLUMNS)}")
+        tokens.append(number or name or operator)
+        position = match.end()
+
+    if not any(token in COLUMNS for token in tokens):
+        raise ValueError("Screen expression must reference at least one field")
+    return " ".join(tokens)
+
+
+def _default_sort(query: str):
+    """Rank by the first field in the filter: ascending for '<' filters, else descending"""
+    tokens = query.split()
+    index = next(i for i, token in enumerate(tokens) if token in COLUMNS)
+    operator = tokens[index + 1] if index + 1 < len(tokens) else None
+    return tokens[index], operator in ("<", "<=")
+
+
+def screen(expression: str, sort_by: Optional[str] = None, ascending: Optional[bool] = None,
+           limit: int = DEFAULT_LIMIT, market=None) -> pd.DataFrame:
+    """Evaluate `expression` over the whole cached universe and return the top matches"""
+    query = compile_expression(expression)
+    snapshot = load_snapshot()
+    try:
+        matches = snapshot.query(query)
+    except Exception as e:
+        raise ValueError(f"Could not evaluate screen expression: {e}")
+
+    default_column, default_ascending = _default_sort(query)
+    sort_by = ALIASES.get((sort_by or "").lower(), sort_by) or default_column
+    if sort_by not in COLUMNS:
+        raise ValueError(f"Unknown sort field '{sort_by}'")
+    ascending = default_ascending if ascending is None else ascending
+
+    results = matches.sort_values(sort_by, ascending=ascending, na_position="last").head(limit)
+    results = results.reset_index()
+    if market is not None:
+        names = {symbol: name for name, symbol in {**market.nse_mapping, **market.bse_mapping}.items()}
+        results.insert(1, "company", results["symbol"].map(names))
+    return results.round(2)
+
+
+def format_results(results: pd.DataFrame, expression: Optional[str] = None) -> str:
+    """Compact text table for the chat context: symbol, company, price and the fields screened on"""
+    if results.empty:
+        return "No symbols matched the screen."
+    fields = ["current_price"]
+    if expression:
+        fields += [token for token in compile_expression(expression).split() if token in COLUMNS]
+    columns = [c for c in ("symbol", "company") if c in results] + list(dict.fromkeys(fields))
+    return results[columns].to_string(index=False)
+
+
+if __name__ == "__main__":
+    from data.marketdata import MarketData
+
+    parser = argparse.ArgumentParser(description="Screen NSE/BSE symbols from cached data")
+    parser.add_argument("expression", nargs="?", help='e.g. "RSI < 30 and PE < 15"')
+    parser.add_argument("--refresh", action="store_true", help="Download prices for all tickers")
+    parser.add_argument("--fundamentals", action="store_true", help="Also refresh fundamentals (slow)")
+    parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT)
+    args = parser.parse_args()
+
+    market = MarketData()
+    if args.refresh:
+        refresh_prices(market.ticker_list)
+        if args.fundamentals:
+            refresh_fundamentals(market.ticker_list)
+    if args.expression:
+        print(screen(args.expression, limit=args.limit, market=market).to_string(index=False))
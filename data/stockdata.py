@@ -3,8 +3,9 @@ import numpy as np
 from data.marketdata import MarketData
 import yfinance as yf
 from tools.search_online import search_ddg_news, extract_article_text
-from utils.summarization import summarize_news
-import plotly.graph_objects as go
+from utils.summarization import summarize_articles
+from utils.dedup import dedup_results, dedup_articles
+from utils.metrics import span
 import matplotlib.pyplot as plt
 from io import BytesIO
 from functools import lru_cache
@@ -179,22 +180,29 @@ def fetch_data(company: str, start_date: str, end_date: str):
     latest_ticker = ticker  # Store this globally so it can be used for news fetching.
     
     # Fetch data with caching
-    data, fundamentals = fetch_financial_data(ticker, start_date, end_date)
+    with span("yfinance_fetch"):
+        data, fundamentals = fetch_financial_data(ticker, start_date, end_date)
     
     if data is not None or not data.empty:
-        stats = calculate_statistics(data, fundamentals)
-        financial_summary = generate_financial_summary(stats)
+        with span("indicators"):
+            stats = calculate_statistics(data, fundamentals)
+            financial_summary = generate_financial_summary(stats)
         financial_summary_context = financial_summary  # Update global context.
-        plot = generate_plots(data, company, start_date, end_date)
+        with span("plotting"):
+            plot = generate_plots(data, company, start_date, end_date)
     else:
         stats = pd.DataFrame(columns=["Metric", "Value"])
         financial_summary = "No financial data available for this company."
         plot = np.zeros((100, 100, 3), dtype=np.uint8)  # Placeholder image  
-    raw_news = search_ddg_news(f"{company} financial news", max_results=5)
+    with span("ddg_search"):
+        raw_news = search_ddg_news(f"{company} financial news", max_results=5)
+    with span("article_extraction"):
+        articles = dedup_articles([extract_article_text(result) for result in dedup_results(raw_news)])
     news_text = "\n".join([
                     f"Title:{article['title']}\n url:({article['url']}): \n text:{article['text'][:500]}"
-                        for article in (extract_article_text(result) for result in raw_news)])
+                        for article in articles])
     
-    news_summary = summarize_news(news_text,company)
+    with span("summarization"):
+        news_summary = summarize_articles(articles, company)
 
     return stats, plot, news_summary if news_summary else "No recent news found", {"finance": financial_summary, "news": news_text}
\ No newline at end of file
@@ -1,30 +1,74 @@
+import argparse
+import contextvars
+import threading
+import time
 import gradio as gr
 import pandas as pd
-import numpy as np
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
 from datetime import datetime, timedelta
-from typing import Tuple
+from typing import Optional, Tuple
 from typing import List, Dict, Any
 from core.chat_agent import ChatAgent
 from data.marketdata import MarketData
-from data.stockdata import fetch_data
-from utils.ollama import model
-from tools.decision import get_tool_decision
-from tools.search_online import search_ddg, extract_article_text
-from rag.rag_pipeline import retrieve_context
-import pdb  # For debugging purposes, can be removed later
+from utils.metrics import span, trace, start_metrics_server
+from utils.answer_cache import SemanticAnswerCache
+from utils.scheduler import (
+    CANCEL_POLL_INTERVAL, INTERACTIVE, PRIORITY_NAMES, QUEUE_LIMITS, QUEUE_SECONDS, REJECTED,
+    SchedulerRejected, cancel_on,
+)
+# Heavy subsystems (yfinance, matplotlib, newspaper, langchain, the embedding model and
+# FAISS index) are imported on first use or by warm_up() once the UI is serving
+
+BUSY_MESSAGE = "The model is busy with other requests right now. Please try again in a moment."
+CHAT_POLL_INTERVAL = 0.5  # seconds between checks for a finished answer / disconnected client
+# Turns allowed to wait for the one in progress; shares the scheduler's interactive limit
+CHAT_QUEUE_LIMIT = QUEUE_LIMITS[INTERACTIVE]
+
+_chat_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="chat")
 
 class FinanceInterface:
     """Handles UI setup and user interactions, using gr.ChatInterface."""
 
     def __init__(self):
-        self.agent = ChatAgent(model)
+        self._agent = None
+        self._agent_lock = threading.Lock()
+        self._turn_lock = threading.Lock()  # One chat turn at a time owns context and history
+        self._turns_waiting = 0
+        self._waiting_lock = threading.Lock()
         self.market = MarketData()
         self.context = {"finance": "", "news": ""}
+        self.answer_cache = SemanticAnswerCache(self._embed_query)
+
+    @property
+    def agent(self) -> ChatAgent:
+        with self._agent_lock:
+            if self._agent is None:
+                from utils.ollama import model
+                self._agent = ChatAgent(model)
+            return self._agent
+
+    @staticmethod
+    def _embed_query(text: str) -> list:
+        from rag.rag_pipeline import embed_query
+        return embed_query(text)
+
+    def warm_up(self) -> None:
+        """Load what the first Fetch Data / chat turn would otherwise wait for"""
+        with span("warm_up"):
+            try:
+                import data.stockdata  # yfinance, matplotlib, newspaper, duckduckgo_search
+                import tools.executor  # langchain, the router and the retrieval pipeline
+                from rag.rag_pipeline import retrieve_context
+                self.agent  # Ollama wrapper (langchain)
+                retrieve_context("warm up")  # Embedding model and FAISS index
+            except Exception as e:
+                print(f"Warm-up incomplete: {e}")
 
     def create_interface(self) -> gr.Blocks:
         with gr.Blocks(theme=gr.themes.Soft()) as demo:
             self._create_company_controls()
             self._create_data_display()
+            self._create_screener()
             self._create_chat_interface()
         return demo
 
@@ -86,6 +130,30 @@ class FinanceInterface:
             outputs=[self.metrics, self.plot, self.news]
         )
 
+    def _create_screener(self) -> None:
+        with gr.Accordion("Stock Screener", open=False):
+            with gr.Row():
+                self.screen_input = gr.Textbox(
+                    label="Filter",
+                    placeholder="RSI < 30 and PE < 15 and 50D SMA > 200D SMA",
+                    scale=4
+                )
+                screen_btn = gr.Button("Screen", scale=1)
+            self.screen_results = gr.Dataframe(
+                interactive=False,
+                label="Matches"
+            )
+        screen_btn.click(
+            fn=self._run_screen,
+            inputs=[self.screen_input],
+            outputs=[self.screen_results]
+        )
+        self.screen_input.submit(
+            fn=self._run_screen,
+            inputs=[self.screen_input],
+            outputs=[self.screen_results]
+        )
+
     def _create_chat_interface(self) -> None:
         gr.Markdown("---")
         self.chat_interface = gr.ChatInterface(
@@ -112,16 +180,114 @@ class FinanceInterface:
         )
 
     def _wrapped_fetch(self, company: str, start_date: str, end_date: str):
-        metrics, plot, news, context = fetch_data(company, start_date, end_date)
+        from data.stockdata import fetch_data
+
+        with trace("fetch_data", company=company):
+            metrics, plot, news, context = fetch_data(company, start_date, end_date)
         self.context.update(context)
         return metrics, plot, news
 
+    def _run_screen(self, expression: str) -> pd.DataFrame:
+        from data.screener import screen
+
+        with trace("screener"):
+            try:
+                return screen(expression, market=self.market)
+            except (ValueError, FileNotFoundError) as e:
+                raise gr.Error(str(e))
+
     def _handle_chat(
         self,
         message: str,
         history: List[Dict[str, Any]],
         company: str
+    ):
+        """
+        Runs the turn on a worker thread and streams a placeholder until it is done.
+        Gradio closes this generator when the client disconnects, which cancels the
+        turn's LLM requests that are still waiting in the scheduler.
+        """
+        # Admitted before submitting, so a burst is turned away instead of piling up in _chat_pool
+        queued_at = self._queue_turn()
+        if queued_at is None:
+            yield BUSY_MESSAGE
+            return
+        cancel = threading.Event()
+
+        def run():
+            with cancel_on(cancel):
+                return self._answer(message, history, company, cancel, queued_at)
+
+        future = _chat_pool.submit(contextvars.copy_context().run, run)
+        try:
+            while True:
+                try:
+                    yield future.result(timeout=CHAT_POLL_INTERVAL)
+                    return
+                except TimeoutError:
+                    yield "Thinking..."
+        finally:
+            cancel.set()
+
+    def _queue_turn(self) -> Optional[float]:
+        """Join the wait for the turn lock; returns the queue time, or None when the queue is full"""
+        with self._waiting_lock:
+            if self._turns_waiting >= CHAT_QUEUE_LIMIT:
+                REJECTED.inc(priority=PRIORITY_NAMES[INTERACTIVE], reason="queue_full")
+                return None
+            self._turns_waiting += 1
+        return time.monotonic()
+
+    def _take_turn(self, queued_at: float, cancel: Optional[threading.Event]) -> bool:
+        """Wait for the turn lock; False if the client went away first"""
+        try:
+            while not self._turn_lock.acquire(timeout=CANCEL_POLL_INTERVAL):
+                if cancel is not None and cancel.is_set():
+                    REJECTED.inc(priority=PRIORITY_NAMES[INTERACTIVE], reason="cancelled")
+                    return False
+        finally:
+            with self._waiting_lock:
+                self._turns_waiting -= 1
+        if cancel is not None and cancel.is_set():
+            self._turn_lock.release()
+            return False
+        QUEUE_SECONDS.observe(time.monotonic() - queued_at, priority=PRIORITY_NAMES[INTERACTIVE])
+        return True
+
+    def _answer(
+        self,
+        message: str,
+        history: List[Dict[str, Any]],
+        company: str,
+        cancel: Optional[threading.Event] = None,
+        queued_at: Optional[float] = None,
+    ) -> str:
+        """
+        Answers one turn. Turns run one at a time, at most CHAT_QUEUE_LIMIT of them wait,
+        and a turn whose client went away (`cancel` set) leaves the shared context and
+        chat history as they were.
+        """
+        if queued_at is None:
+            queued_at = self._queue_turn()
+            if queued_at is None:
+                return BUSY_MESSAGE
+        if not self._take_turn(queued_at, cancel):
+            return ""
+        try:
+            return self._answer_turn(message, history, company, cancel)
+        finally:
+            self._turn_lock.release()
+
+    def _answer_turn(
+        self,
+        message: str,
+        history: List[Dict[str, Any]],
+        company: str,
+        cancel: Optional[threading.Event],
     ) -> str:
+        def cancelled() -> bool:
+            return cancel is not None and cancel.is_set()
+
         if not self.context:
             self.context = {"finance": "", "news": ""}
 
@@ -129,46 +295,84 @@ class FinanceInterface:
         messages = [(entry["role"], entry["content"]) for entry in history if isinstance(entry, dict)]
         messages.append(("user", message))
 
-        decision = get_tool_decision(message, company)
-
-        if "financial_retriever" in decision.tools_needed:
-            print("Retrieving financial documents...")
-            retrieved_docs = retrieve_context(decision.financial_query)
-            self.context["finance"] += "\n\nAdditional Documents:\n" + retrieved_docs[:500]
-            print("Retrieved financial documents:")
-
-        if "web_search" in decision.tools_needed:
-            print("Performing web search for news...")
-            search_query = (decision.search_query or message)
-            search_results = search_ddg(f"{search_query}",3)
-
-            web_results = []
-            for result in search_results:
-    
-                article = extract_article_text(result)
-                if article:
-                    excerpt = article["text"][:100].replace("\n", " ")
-                    web_results.append(
-                        f"- {article['title']}\n  Source: {article['url']}\n  Excerpt: {excerpt}..."
+        with trace("chat", company=company):
+            company = company or "No company selected"
+            # Answers are stored under the context they were generated with, which is what
+            # self.context holds when the same question comes back
+            turn_context = dict(self.context)
+            with span("answer_cache"):
+                cached, question_vector = self.answer_cache.lookup(message, company, turn_context)
+            if cached is not None:
+                if not cancelled():
+                    self.agent.record_turn(message, company, self.context, cached)
+                return cached
+
+            from tools.executor import run_tools
+
+            try:
+                tools = run_tools(message, company)
+            except SchedulerRejected:
+                return ""  # Client went away before routing ran
+
+            # Tool output is only added to self.context once the turn has been answered
+            added = {"finance": "", "news": ""}
+            if tools["finance"]:
+                added["finance"] += "\n\nAdditional Documents:\n" + tools["finance"][:500]
+
+            if tools["news"]:
+                added["news"] += "\n\nWeb Results:\n" + "\n".join(tools["news"])
+
+            if tools["screen"]:
+                added["finance"] += "\n\nScreener Results:\n" + tools["screen"]
+            context = {key: turn_context.get(key, "") + text for key, text in added.items()}
+
+            if cancelled():
+                return ""
+
+            checkpoint = self.agent.checkpoint()
+            try:
+                with span("chat_generation"):
+                    agent_out = self.agent.generate_response(
+                        user_message=message,
+                        company=company,
+                        context={
+                            "finance": context.get("finance", "No financial data available"),
+                            "news": context.get("news", "No recent news available.")
+                        }
                     )
-            if web_results:
-                self.context["news"] += "\n\nWeb Results:\n" + "\n".join(web_results)
-            print("Web search done:")
-            
-        agent_out = self.agent.generate_response(
-            user_message=message,
-            company=company or "No company selected",
-            context={
-                "finance": self.context.get("finance", "No financial data available"),
-                "news": self.context.get("news", "No recent news available.")
-            }
-        )
+            except SchedulerRejected:
+                return BUSY_MESSAGE
+            if cancelled():
+                # Nobody saw this answer; the next turn continues from the old history
+                self.agent.rollback(checkpoint)
+                return ""
+
+            for key, text in added.items():
+                self.context[key] = self.context.get(key, "") + text
+            self.answer_cache.store(message, company, context, agent_out["text"], question_vector)
         return agent_out["text"]
 
 
 if __name__ == "__main__":
+    from utils.startup import PROBE_FLAG, format_report, probe, profile_startup
+
+    parser = argparse.ArgumentParser(description="FIN-Agent Gradio app")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Report per-package import time and time to first render, then exit")
+    parser.add_argument(PROBE_FLAG, action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.profile_startup:
+        print(format_report(profile_startup(__file__)))
+        raise SystemExit(0)
+
     interface = FinanceInterface()
     demo = interface.create_interface()
+    if args.startup_probe:
+        probe(demo)
+        raise SystemExit(0)
 
-    # demo.launch()
-    demo.launch()
\ No newline at end of file
+    start_metrics_server()  # Prometheus text format at http://127.0.0.1:9464/metrics
+    demo.launch(prevent_thread_lock=True)
+    threading.Thread(target=interface.warm_up, name="warm-up", daemon=True).start()
+    demo.block_thread()
\ No newline at end of file
@@ -0,0 +1,212 @@
+"""
+Columnar, memory-mapped chunk store that replaces FAISS.save_local's index.pkl.
+
+An index directory holds:
+    index.faiss             the FAISS index (faiss.write_index)
+    chunks.bin              zlib-compressed chunk texts, back to back
+    chunks.offsets.npy      int64 byte offsets into chunks.bin, one per chunk plus the end
+    meta.<field>.npy        one fixed-width array per metadata field
+    meta.<field>.state.npy  int8 per chunk: key absent, None, or value in meta.<field>.npy
+    chunks.json             manifest: chunk count and metadata field names
+
+Vector id i is chunk i, so nothing has to be unpickled or held in memory: the arrays
+are memory-mapped and a Document is only built for the hits a search returns.
+
+Migrate an index written by the old save_local (trusted files only, it unpickles):
+    python -m rag.docstore migrate vector_db.index
+"""
+import argparse
+import json
+import os
+import zlib
+from collections.abc import Mapping
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+from langchain_community.docstore.base import Docstore
+from langchain_core.documents import Document
+
+CHUNKS_FILE = "chunks.bin"
+OFFSETS_FILE = "chunks.offsets.npy"
+MANIFEST_FILE = "chunks.json"
+INDEX_FILE = "index.faiss"
+COMPRESSION_LEVEL = 6
+
+
+def _meta_file(field: str) -> str:
+    return f"meta.{field}.npy"
+
+
+def _state_file(field: str) -> str:
+    return f"meta.{field}.state.npy"
+
+
+# Per chunk and field: key absent, value None, or value stored in the column
+ABSENT, NONE, PRESENT = 0, 1, 2
+
+
+def _column(values: list) -> np.ndarray:
+    """Fixed-width array for one metadata field: bool, int64, float64 or bytes; gaps hold 0 / b"" """
+    present = [v for v in values if v is not None]
+    if present and all(isinstance(v, (bool, np.bool_)) for v in present):
+        return np.array([bool(v) for v in values], dtype=bool)
+    if present and all(isinstance(v, (int, np.integer)) and not isinstance(v, (bool, np.bool_)) for v in present):
+        return np.array([0 if v is None else v for v in values], dtype=np.int64)
+    if present and all(isinstance(v, (int, float, np.number)) and not isinstance(v, (bool, np.bool_))
+                       for v in present):
+        return np.array([0.0 if v is None else v for v in values], dtype=np.float64)
+    encoded = [b"" if v is None else str(v).encode("utf-8") for v in values]
+    return np.array(encoded, dtype=f"S{max([1] + [len(e) for e in encoded])}")
+
+
+def write_chunk_store(path: str, texts: List[str], metadatas: Optional[List[Dict]] = None) -> None:
+    """Write texts[i] / metadatas[i] as chunk i"""
+    metadatas = metadatas or [{} for _ in texts]
+    os.makedirs(path, exist_ok=True)
+
+    offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+    with open(os.path.join(path, CHUNKS_FILE), "wb") as f:
+        for i, text in enumerate(texts):
+            blob = zlib.compress(text.encode("utf-8"), COMPRESSION_LEVEL)
+            f.write(blob)
+            offsets[i + 1] = offsets[i] + len(blob)
+    np.save(os.path.join(path, OFFSETS_FILE), offsets)
+
+    fields = sorted({key for metadata in metadatas for key in metadata})
+    for field in fields:
+        np.save(os.path.join(path, _meta_file(field)), _column([m.get(field) for m in metadatas]))
+        state = [ABSENT if field not in m else NONE if m[field] is None else PRESENT for m in metadatas]
+        np.save(os.path.join(path, _state_file(field)), np.array(state, dtype=np.int8))
+
+    with open(os.path.join(path, MANIFEST_FILE), "w") as f:
+        json.dump({"count": len(texts), "fields": fields}, f)
+
+
+def save_index(path: str, index, texts: List[str], metadatas: Optional[List[Dict]] = None) -> None:
+    """Write a FAISS index whose vector i embeds texts[i], plus its chunk store"""
+    import faiss
+
+    if index.ntotal != len(texts):
+        raise ValueError(f"Index has {index.ntotal} vectors but {len(texts)} texts were given")
+    write_chunk_store(path, texts, metadatas)
+    faiss.write_index(index, os.path.join(path, INDEX_FILE))
+
+
+class ChunkStore(Docstore):
+    """Read-only Docstore over a chunk store directory; ids are vector positions"""
+
+    def __init__(self, path: str):
+        with open(os.path.join(path, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+        self.count = manifest["count"]
+        self.offsets = np.load(os.path.join(path, OFFSETS_FILE), mmap_mode="r")
+        size = int(self.offsets[-1])
+        self.blob = np.memmap(os.path.join(path, CHUNKS_FILE), dtype=np.uint8, mode="r") if size else b""
+        self.columns = {field: np.load(os.path.join(path, _meta_file(field)), mmap_mode="r")
+                        for field in manifest["fields"]}
+        # Stores written before states were recorded have a value for every chunk
+        self.states = {field: np.load(os.path.join(path, _state_file(field)), mmap_mode="r")
+                       for field in manifest["fields"] if os.path.exists(os.path.join(path, _state_file(field)))}
+
+    def __len__(self) -> int:
+        return self.count
+
+    def text(self, i: int) -> str:
+        start, end = int(self.offsets[i]), int(self.offsets[i + 1])
+        return zlib.decompress(bytes(self.blob[start:end])).decode("utf-8")
+
+    def metadata(self, i: int) -> Dict:
+        metadata = {}
+        for field, column in self.columns.items():
+            state = self.states[field][i] if field in self.states else PRESENT
+            if state == ABSENT:
+                continue
+            if state == NONE:
+                metadata[field] = None
+                continue
+            value = column[i]
+            if column.dtype.kind == "S":
+                metadata[field] = value.decode("utf-8")
+            elif column.dtype.kind == "b":
+                metadata[field] = bool(value)
+            elif column.dtype.kind == "f":
+                if field not in self.states and np.isnan(value):
+                    continue  # Older stores marked a missing number with NaN
+                metadata[field] = float(value)
+            else:
+                metadata[field] = int(value)
+        return metadata
+
+    def search(self, search: Union[int, str]) -> Union[str, Document]:
+        try:
+            i = int(search)
+        except (TypeError, ValueError):
+            return f"ID {search} not found."
+        if not 0 <= i < self.count:
+            return f"ID {search} not found."
+        return Document(page_content=self.text(i), metadata=self.metadata(i))
+
+
+class Positions(Mapping):
+    """index_to_docstore_id for a ChunkStore: vector i maps to chunk i"""
+
+    def __init__(self, count: int):
+        self.count = count
+
+    def __getitem__(self, i):
+        i = int(i)
+        if not 0 <= i < self.count:
+            raise KeyError(i)
+        return i
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self):
+        return iter(range(self.count))
+
+
+def load_index(path: str, embeddings):
+    """FAISS vector store over index.faiss and the memory-mapped chunk store in `path`"""
+    import faiss
+    from langchain_community.vectorstores import FAISS
+
+    if not os.path.exists(os.path.join(path, MANIFEST_FILE)):
+        raise FileNotFoundError(
+            f"No chunk store in {path}; rebuild it with `python -m rag.embed_documents` "
+            f"or convert an old index with `python -m rag.docstore migrate {path}`"
+        )
+    store = ChunkStore(path)
+    try:
+        # Vectors are paged in on demand and shared between processes through the page cache
+        index = faiss.read_index(os.path.join(path, INDEX_FILE), faiss.IO_FLAG_MMAP)
+    except RuntimeError:
+        index = faiss.read_index(os.path.join(path, INDEX_FILE))  # Index type without mmap support
+    if index.ntotal != len(store):
+        raise ValueError(f"{path}: index has {index.ntotal} vectors but the chunk store has {len(store)}")
+    return FAISS(embedding_function=embeddings, index=index, docstore=store,
+                 index_to_docstore_id=Positions(len(store)))
+
+
+def migrate(path: str) -> None:
+    """Convert a save_local directory (index.pkl) into a chunk store in place"""
+    import pickle
+
+    with open(os.path.join(path, "index.pkl"), "rb") as f:
+        docstore, index_to_docstore_id = pickle.load(f)
+
+    texts, metadatas = [], []
+    for i in range(len(index_to_docstore_id)):
+        doc = docstore.search(index_to_docstore_id[i])
+        texts.append(doc.page_content)
+        metadatas.append(doc.metadata)
+    write_chunk_store(path, texts, metadatas)
+    print(f"Wrote {len(texts)} chunks to {path}; index.pkl is no longer needed")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chunk store tools")
+    parser.add_argument("command", choices=["migrate"])
+    parser.add_argument("path", help="Index directory, e.g. vector_db.index")
+    args = parser.parse_args()
+    migrate(args.path)
@@ -1,7 +1,9 @@
+import argparse
 import os
 import hashlib
 from langchain_community.vectorstores import FAISS
-from langchain_community.embeddings import SentenceTransformerEmbeddings
+from rag.docstore import save_index
+from rag.embeddings import get_embeddings
 from PyPDF2 import PdfReader
 from ebooklib import epub
 from bs4 import BeautifulSoup
@@ -37,6 +39,11 @@ def compute_hash(text):
     return hashlib.md5(text.encode('utf-8')).hexdigest()
 
 def main():
+    parser = argparse.ArgumentParser(description="Embed finance resources into a FAISS index")
+    parser.add_argument("--output", default="vector_db.index",
+                        help="Index directory; write a new one and POST /reload to swap a running retrieval server")
+    args = parser.parse_args()
+
     documents = []  
     metadata = []   
     seen_hashes = set()
@@ -76,18 +83,18 @@ def main():
         print("No documents to process.")
         exit(0)
 
-    # Initialize SentenceTransformer embeddings using the new import path.
-    embeddings = SentenceTransformerEmbeddings(model_name="all-MiniLM-L6-v2")
+    # Same MiniLM model as retrieval; the backend is chosen by FIN_AGENT_EMBEDDINGS.
+    embeddings = get_embeddings()
 
     # Build the FAISS vector store using the helper method. This method
     # creates the index, stores document texts, and associates metadata.
     vector_db = FAISS.from_texts(texts=documents, embedding=embeddings, metadatas=metadata)
     print(f"Added {len(documents)} documents to the vector store.")
 
-    # Save the vector store locally. This creates a directory (e.g. 'vector_db.index')
-    # with all the required files (e.g., index.faiss, index.pkl, and metadata.json).
-    vector_db.save_local("vector_db.index")
-    print("Vector DB saved locally in the 'vector_db.index' directory.")
+    # Save the index and a memory-mapped chunk store (see rag/docstore.py) instead of
+    # save_local's index.pkl. from_texts adds the texts in order, so vector i is documents[i].
+    save_index(args.output, vector_db.index, documents, metadata)
+    print(f"Vector DB saved locally in the '{args.output}' directory.")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,129 @@
+import os
+import threading
+from concurrent.futures import Future
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+# torch: sentence-transformers on PyTorch (the original setup)
+# onnx: ONNX Runtime fp32, no torch import
+# onnx-int8: ONNX Runtime with the dynamically quantized export, smallest and fastest on CPU
+EMBEDDING_BACKEND = os.environ.get("FIN_AGENT_EMBEDDINGS", "torch")
+ONNX_FILES = {
+    "onnx": "onnx/model.onnx",
+    "onnx-int8": "onnx/model_quint8_avx2.onnx",
+}
+MAX_SEQ_LENGTH = 256  # all-MiniLM-L6-v2's sentence-transformers limit
+BATCH_SIZE = 32
+QUERY_BATCH_WINDOW = 0.005  # seconds to wait for concurrent queries to share a batch
+
+
+class OnnxMiniLMEmbeddings(Embeddings):
+    """
+    all-MiniLM-L6-v2 on ONNX Runtime: tokenizers for tokenization, mean pooling and
+    L2 normalization in numpy, which matches the sentence-transformers pipeline.
+    `model_path`/`tokenizer_path` may be local files; otherwise they are fetched from
+    the Hugging Face Hub.
+    """
+
+    def __init__(self, model_file: str = ONNX_FILES["onnx"], model_id: str = EMBEDDING_MODEL,
+                 model_path: Optional[str] = None, tokenizer_path: Optional[str] = None,
+                 batch_size: int = BATCH_SIZE, max_length: int = MAX_SEQ_LENGTH):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        if model_path is None or tokenizer_path is None:
+            from huggingface_hub import hf_hub_download
+            model_path = model_path or hf_hub_download(model_id, model_file)
+            tokenizer_path = tokenizer_path or hf_hub_download(model_id, "tokenizer.json")
+
+        self.tokenizer = Tokenizer.from_file(tokenizer_path)
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+        self.session = ort.InferenceSession(model_path, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.batch_size = batch_size
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+
+        output = self.session.run(None, feeds)[0]
+        if output.ndim == 3:
+            # Token embeddings -> masked mean pooling
+            mask = attention_mask[..., None].astype(output.dtype)
+            output = (output * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(output, axis=1, keepdims=True)
+        return output / np.clip(norms, 1e-12, None)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        # Batch texts of similar length together to keep padding small
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors = [None] * len(texts)
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            for index, vector in zip(batch, self._encode([texts[i] for i in batch])):
+                vectors[index] = vector.tolist()
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._encode([text])[0].tolist()
+
+
+class BatchedEmbeddings(Embeddings):
+    """
+    Coalesces concurrent embed_query calls into one embed_documents call.
+    The first caller waits up to `window` seconds for others to join, so a burst of
+    queries from several threads costs one forward pass instead of many.
+    """
+
+    def __init__(self, inner: Embeddings, window: float = QUERY_BATCH_WINDOW, max_batch: int = BATCH_SIZE):
+        self.inner = inner
+        self.window = window
+        self.max_batch = max_batch
+        self._pending: List[tuple] = []
+        self._lock = threading.Lock()
+        self._full = threading.Condition(self._lock)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.inner.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        future = Future()
+        with self._lock:
+            self._pending.append((text, future))
+            leader = len(self._pending) == 1
+            if len(self._pending) >= self.max_batch:
+                self._full.notify()
+            if leader:
+                self._full.wait(timeout=self.window)
+                batch, self._pending = self._pending, []
+
+        if leader:
+            try:
+                vectors = self.inner.embed_documents([t for t, _ in batch])
+                for (_, f), vector in zip(batch, vectors):
+                    f.set_result(vector)
+            except Exception as e:
+                for _, f in batch:
+                    f.set_exception(e)
+        return future.result()
+
+
+def get_embeddings(backend: Optional[str] = None, batched: bool = True) -> Embeddings:
+    """Build the MiniLM embedder for `backend` (defaults to FIN_AGENT_EMBEDDINGS)"""
+    backend = backend or EMBEDDING_BACKEND
+    if backend == "torch":
+        from langchain_huggingface import HuggingFaceEmbeddings
+        embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
+    elif backend in ONNX_FILES:
+        embeddings = OnnxMiniLMEmbeddings(model_file=ONNX_FILES[backend])
+    else:
+        raise ValueError(f"Unknown embedding backend '{backend}'. Use torch, {', '.join(ONNX_FILES)}")
+    return BatchedEmbeddings(embeddings) if batched else embeddings
@@ -1,30 +1,114 @@
 import json
+import os
+import threading
+from typing import List
+
+import numpy as np
+import requests
 from langchain_community.vectorstores import FAISS
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain.chains import RetrievalQA
-from utils.ollama import model
+from rag.docstore import load_index
+from rag.embeddings import get_embeddings
+
+VECTOR_DB_PATH = os.environ.get("FIN_AGENT_VECTOR_DB", "vector_db.index")
+# When set (e.g. http://127.0.0.1:9465), retrieval and query embeddings are served by
+# rag/retrieval_server.py instead of loading the model and index in this process
+RETRIEVAL_URL = os.environ.get("FIN_AGENT_RETRIEVAL_URL")
+RETRIEVAL_TIMEOUT = 30  # seconds
+TOP_K = 5
+
+_embeddings = None
+_vector_db = None
+_rag_chain = None
+_load_lock = threading.Lock()
+_db_lock = threading.Lock()
+_session = requests.Session()
+
+
+def load_embeddings():
+    """The MiniLM embedder, loaded on first use (backend chosen by FIN_AGENT_EMBEDDINGS)"""
+    global _embeddings
+    with _load_lock:
+        if _embeddings is None:
+            _embeddings = get_embeddings()
+        return _embeddings
 
-embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-vector_db = FAISS.load_local("vector_db.index", embeddings, allow_dangerous_deserialization=True)
-retriever = vector_db.as_retriever(search_kwargs={"k": 5})
 
-rag_chain = RetrievalQA.from_chain_type(
-    llm=model,
-    chain_type="stuff",
-    retriever=retriever,
-    return_source_documents=True
-)
+def load_vector_db(path: str = VECTOR_DB_PATH) -> FAISS:
+    """Load a FAISS store saved by rag/embed_documents.py; documents stay on disk until hit"""
+    return load_index(path, load_embeddings())
+
+
+def _local_db() -> FAISS:
+    global _vector_db
+    with _db_lock:
+        if _vector_db is None:
+            _vector_db = load_vector_db()
+        return _vector_db
+
+
+def search(vector_db: FAISS, queries: List[str], k: int = TOP_K) -> List[List[str]]:
+    """
+    Top-k document texts for several queries with one embedding batch and one FAISS
+    search. Matches vector_db.similarity_search for each query.
+    """
+    if len(queries) == 1:
+        # Goes through BatchedEmbeddings, which coalesces concurrent single queries
+        embedded = [vector_db.embeddings.embed_query(queries[0])]
+    else:
+        embedded = vector_db.embeddings.embed_documents(queries)
+    vectors = np.asarray(embedded, dtype=np.float32)
+    if vector_db._normalize_L2:
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    _, indices = vector_db.index.search(vectors, k)
+
+    results = []
+    for row in indices:
+        texts = []
+        for i in row:
+            if i == -1:
+                continue  # Fewer than k vectors in the index
+            doc = vector_db.docstore.search(vector_db.index_to_docstore_id[i])
+            texts.append(doc.page_content)
+        results.append(texts)
+    return results
+
+
+def _remote(path: str, payload: dict) -> dict:
+    response = _session.post(f"{RETRIEVAL_URL.rstrip('/')}{path}", json=payload, timeout=RETRIEVAL_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
 
 def rag_answer(user_question: str) -> str:
-    result = rag_chain.invoke(user_question)
+    from langchain.chains import RetrievalQA
+    from utils.ollama import model
+
+    global _rag_chain
+    if _rag_chain is None:
+        _rag_chain = RetrievalQA.from_chain_type(
+            llm=model,
+            chain_type="stuff",
+            retriever=_local_db().as_retriever(search_kwargs={"k": TOP_K}),
+            return_source_documents=True
+        )
+    result = _rag_chain.invoke(user_question)
     return result["result"]
 
+def embed_query(text: str) -> list:
+    """Embed a single query with the same MiniLM model used for the index."""
+    if RETRIEVAL_URL:
+        return _remote("/embed", {"texts": [text]})["vectors"][0]
+    return load_embeddings().embed_query(text)
+
 def retrieve_context(query: str) -> str:
     """
     Retrieve additional context documents from the FAISS index.
     Returns a concatenated string of relevant document excerpts.
     """
-    retrieved_docs = retriever.get_relevant_documents(query)
+    if RETRIEVAL_URL:
+        retrieved = _remote("/search", {"queries": [query], "k": TOP_K})["results"][0]
+    else:
+        retrieved = search(_local_db(), [query], TOP_K)[0]
     # Concatenate the retrieved text from each document.
-    context = "\n\n".join([doc.page_content for doc in retrieved_docs])
+    context = "\n\n".join(retrieved)
     return context
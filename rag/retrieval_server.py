@@ -0,0 +1,158 @@
+"""
+Out-of-process retrieval for multi-worker deployments.
+
+One process holds the embedding model and the FAISS index; Gradio workers started
+with FIN_AGENT_RETRIEVAL_URL=http://127.0.0.1:9465 call it instead of loading their
+own copies. Concurrent /search requests from all workers are batched into one
+embedding pass and one FAISS search.
+
+    python -m rag.retrieval_server --index vector_db.index
+
+Endpoints (JSON over HTTP, localhost only):
+    POST /search  {"queries": [...], "k": 5}   -> {"results": [[text, ...], ...], "version": ...}
+    POST /embed   {"texts": [...]}             -> {"vectors": [[...], ...]}
+    POST /reload  {"path": "vector_db.v2.index"} (path optional, defaults to the current one)
+    GET  /health                               -> {"version": ..., "queries": ...}
+
+/reload loads the new index next to the old one and swaps it in once it is ready;
+searches keep using the old index until then, so there is no downtime.
+"""
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from rag.rag_pipeline import VECTOR_DB_PATH, TOP_K, load_embeddings, load_vector_db, search
+from utils.metrics import registry, span
+
+RETRIEVAL_HOST = "127.0.0.1"
+RETRIEVAL_PORT = int(os.environ.get("FIN_AGENT_RETRIEVAL_PORT", "9465"))
+BATCH_WINDOW = 0.005  # seconds to wait for more queries before searching
+MAX_BATCH = 64
+
+BATCH_SIZE = registry.histogram("fin_agent_retrieval_batch_size", "Queries per batched search",
+                                (1, 2, 4, 8, 16, 32, 64))
+
+
+class RetrievalService:
+    """Holds the current index and batches queries against it"""
+
+    def __init__(self, path: str = VECTOR_DB_PATH, window: float = BATCH_WINDOW, max_batch: int = MAX_BATCH):
+        self.window = window
+        self.max_batch = max_batch
+        self.embeddings = load_embeddings()
+        self.path = path
+        self.vector_db = load_vector_db(path)
+        self.version = self._version(path)
+        self.queries = 0
+        self._reload_lock = threading.Lock()
+        self._requests = queue.Queue()
+        threading.Thread(target=self._batch_loop, name="retrieval-batcher", daemon=True).start()
+
+    @staticmethod
+    def _version(path: str) -> str:
+        index_file = os.path.join(path, "index.faiss")
+        return f"{os.path.abspath(path)}@{int(os.path.getmtime(index_file))}"
+
+    def reload(self, path: str = None) -> str:
+        """Load `path` (default: the current path) and swap it in atomically"""
+        path = path or self.path
+        with self._reload_lock:
+            with span("retrieval_reload"):
+                vector_db = load_vector_db(path)
+            # A single assignment each: batches already running keep the old index
+            self.vector_db, self.path, self.version = vector_db, path, self._version(path)
+        print(f"Retrieval index now {self.version}")
+        return self.version
+
+    def search(self, queries, k: int = TOP_K):
+        """Queue the queries for the next batch and wait for their results"""
+        futures = []
+        for query in queries:
+            future = Future()
+            self._requests.put((query, k, future))
+            futures.append(future)
+        return [future.result() for future in futures]
+
+    def _batch_loop(self):
+        while True:
+            batch = [self._requests.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._requests.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+
+            vector_db = self.vector_db
+            BATCH_SIZE.observe(len(batch))
+            self.queries += len(batch)
+            try:
+                with span("retrieval_batch"):
+                    k = max(k for _, k, _ in batch)
+                    results = search(vector_db, [query for query, _, _ in batch], k)
+                for (_, query_k, future), texts in zip(batch, results):
+                    future.set_result(texts[:query_k])
+            except Exception as e:
+                for _, _, future in batch:
+                    future.set_exception(e)
+
+
+def _handler(service: RetrievalService):
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, status: int, body: dict):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path != "/health":
+                self.send_error(404)
+                return
+            self._reply(200, {"version": service.version, "queries": service.queries})
+
+        def do_POST(self):
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                if self.path == "/search":
+                    results = service.search(payload["queries"], int(payload.get("k", TOP_K)))
+                    self._reply(200, {"results": results, "version": service.version})
+                elif self.path == "/embed":
+                    texts = payload["texts"]
+                    # Single queries go through embed_query so concurrent workers share a batch
+                    vectors = ([service.embeddings.embed_query(texts[0])] if len(texts) == 1
+                               else service.embeddings.embed_documents(texts))
+                    self._reply(200, {"vectors": vectors})
+                elif self.path == "/reload":
+                    self._reply(200, {"version": service.reload(payload.get("path"))})
+                else:
+                    self.send_error(404)
+            except (KeyError, ValueError) as e:
+                self._reply(400, {"error": str(e)})
+            except Exception as e:
+                print(f"Retrieval server error: {e}")
+                self._reply(500, {"error": str(e)})
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shared retrieval server for fin-agent workers")
+    parser.add_argument("--index", default=VECTOR_DB_PATH, help="Directory written by rag/embed_documents.py")
+    parser.add_argument("--port", type=int, default=RETRIEVAL_PORT)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((RETRIEVAL_HOST, args.port), _handler(RetrievalService(args.index)))
+    print(f"Serving retrieval for {args.index} on http://{RETRIEVAL_HOST}:{args.port}")
+    server.serve_forever()
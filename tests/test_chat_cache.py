@@ -0,0 +1,38 @@
+import pytest
+
+pytest.importorskip("gradio")
+
+import gradio_app
+from core.chat_agent import ChatAgent
+from utils.answer_cache import SemanticAnswerCache
+
+
+class CountingModel:
+    def __init__(self):
+        self.calls = 0
+
+    def chat(self, messages):
+        self.calls += 1
+        return f"answer {self.calls}"
+
+
+@pytest.fixture
+def interface(monkeypatch):
+    monkeypatch.setattr(gradio_app, "MarketData", lambda: None)
+    monkeypatch.setattr("tools.executor.run_tools", lambda message, company: {
+        "finance": "Annual report excerpt", "news": ["- Results beat estimates"], "screen": "",
+    })
+    interface = gradio_app.FinanceInterface()
+    interface._agent = ChatAgent(CountingModel())
+    interface.answer_cache = SemanticAnswerCache(lambda text: [1.0, float(len(text)), 0.0])
+    return interface
+
+
+def test_repeat_after_tool_turn_hits_cache(interface):
+    question = "How did the latest results compare with estimates?"
+    first = interface._answer(question, [], "TCS")
+    assert "Web Results" in interface.context["news"]
+
+    assert interface._answer(question, [], "TCS") == first
+    assert interface._answer(question, [], "TCS") == first
+    assert interface.agent.model.calls == 1
@@ -0,0 +1,41 @@
+import threading
+
+import pytest
+
+pytest.importorskip("gradio")
+
+import gradio_app
+
+
+@pytest.fixture
+def interface(monkeypatch):
+    monkeypatch.setattr(gradio_app, "MarketData", lambda: None)
+    return gradio_app.FinanceInterface()
+
+
+def test_full_queue_is_rejected(interface):
+    interface._turn_lock.acquire()  # A turn in progress
+    try:
+        for _ in range(gradio_app.CHAT_QUEUE_LIMIT):
+            assert interface._queue_turn() is not None
+        assert interface._answer("What is the price trend?", [], "TCS") == gradio_app.BUSY_MESSAGE
+        assert next(interface._handle_chat("What is the price trend?", [], "TCS")) == gradio_app.BUSY_MESSAGE
+    finally:
+        interface._turn_lock.release()
+
+
+def test_cancelled_while_waiting(interface):
+    cancel = threading.Event()
+    results = []
+    interface._turn_lock.acquire()
+    try:
+        waiting = threading.Thread(target=lambda: results.append(
+            interface._answer("What is the price trend?", [], "TCS", cancel)))
+        waiting.start()
+        cancel.set()
+        waiting.join(timeout=5)
+    finally:
+        interface._turn_lock.release()
+    assert results == [""]
+    assert interface._turns_waiting == 0
+    assert not interface._turn_lock.locked()
@@ -0,0 +1,19 @@
+from rag.docstore import ChunkStore, write_chunk_store
+
+
+def test_metadata_round_trip(tmp_path):
+    metadatas = [
+        {"page": 1, "source": "a.pdf", "ocr": True, "score": 0.5, "note": None},
+        {"page": 2, "ocr": False, "score": 1.5},
+        {"source": "c.pdf", "note": "scanned"},
+    ]
+    texts = ["first chunk", "second chunk", "third chunk"]
+    write_chunk_store(str(tmp_path), texts, metadatas)
+
+    store = ChunkStore(str(tmp_path))
+    for i, (text, metadata) in enumerate(zip(texts, metadatas)):
+        doc = store.search(i)
+        assert doc.page_content == text
+        assert doc.metadata == metadata
+        assert {k: type(v) for k, v in doc.metadata.items()} == {k: type(v) for k, v in metadata.items()}
+    assert store.search(3) == "ID 3 not found."
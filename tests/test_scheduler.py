@@ -0,0 +1,134 @@
+import threading
+import time
+
+import pytest
+
+from utils.scheduler import BACKGROUND, INTERACTIVE, ROUTER, LLMScheduler, SchedulerRejected, cancel_on
+
+
+def make_scheduler(limits=None, timeouts=None) -> LLMScheduler:
+    return LLMScheduler(
+        concurrency=1,
+        queue_limits=limits or {INTERACTIVE: 4, ROUTER: 4, BACKGROUND: 4},
+        queue_timeouts=timeouts or {INTERACTIVE: None, ROUTER: None, BACKGROUND: None},
+    )
+
+
+def hold_slot(scheduler: LLMScheduler):
+    """Occupy the only slot until the returned event is set"""
+    held, release = threading.Event(), threading.Event()
+
+    def run():
+        with scheduler.slot(INTERACTIVE):
+            held.set()
+            release.wait()
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    held.wait()
+    return release, thread
+
+
+def wait_queued(scheduler: LLMScheduler, count: int) -> None:
+    deadline = time.monotonic() + 5
+    while sum(scheduler.queue_depths().values()) < count:
+        assert time.monotonic() < deadline, "requests never queued"
+        time.sleep(0.01)
+
+
+def submit(scheduler: LLMScheduler, name: str, priority: int, results: list, cancel=None) -> threading.Thread:
+    def run():
+        try:
+            with scheduler.slot(priority, cancel):
+                results.append(name)
+        except SchedulerRejected as e:
+            results.append(f"{name}:{e.reason}")
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def test_priority_then_arrival_order():
+    scheduler = make_scheduler()
+    release, holder = hold_slot(scheduler)
+    results = []
+    threads = []
+    for count, (name, priority) in enumerate(
+            [("bg1", BACKGROUND), ("r1", ROUTER), ("i1", INTERACTIVE), ("bg2", BACKGROUND), ("i2", INTERACTIVE)], 1):
+        threads.append(submit(scheduler, name, priority, results))
+        wait_queued(scheduler, count)
+
+    release.set()
+    for thread in [holder, *threads]:
+        thread.join()
+    assert results == ["i1", "i2", "r1", "bg1", "bg2"]
+    assert scheduler._running == 0
+
+
+def test_queue_full():
+    scheduler = make_scheduler(limits={INTERACTIVE: 4, ROUTER: 4, BACKGROUND: 1})
+    release, holder = hold_slot(scheduler)
+    results = []
+    first = submit(scheduler, "bg1", BACKGROUND, results)
+    wait_queued(scheduler, 1)
+
+    with pytest.raises(SchedulerRejected) as rejected:
+        with scheduler.slot(BACKGROUND):
+            pass
+    assert rejected.value.reason == "queue_full"
+
+    release.set()
+    holder.join()
+    first.join()
+    assert results == ["bg1"]
+    assert scheduler._running == 0
+
+
+def test_timeout():
+    scheduler = make_scheduler(timeouts={INTERACTIVE: None, ROUTER: 0.2, BACKGROUND: None})
+    release, holder = hold_slot(scheduler)
+
+    with pytest.raises(SchedulerRejected) as rejected:
+        with scheduler.slot(ROUTER):
+            pass
+    assert rejected.value.reason == "timeout"
+    assert scheduler.queue_depths()["router"] == 0
+
+    release.set()
+    holder.join()
+    assert scheduler._running == 0
+
+
+def test_cancel():
+    scheduler = make_scheduler()
+    release, holder = hold_slot(scheduler)
+    results = []
+    cancel = threading.Event()
+    waiting = submit(scheduler, "i1", INTERACTIVE, results, cancel)
+    wait_queued(scheduler, 1)
+
+    cancel.set()
+    waiting.join()
+    assert results == ["i1:cancelled"]
+    assert scheduler.queue_depths()["interactive"] == 0
+
+    # Already cancelled requests are rejected without queueing, also via cancel_on
+    with cancel_on(cancel), pytest.raises(SchedulerRejected):
+        with scheduler.slot(INTERACTIVE):
+            pass
+
+    release.set()
+    holder.join()
+    assert scheduler._running == 0
+
+
+def test_slot_released_on_error():
+    scheduler = make_scheduler()
+    with pytest.raises(RuntimeError):
+        with scheduler.slot(INTERACTIVE):
+            raise RuntimeError("model failed")
+    assert scheduler._running == 0
+    with scheduler.slot(BACKGROUND):
+        assert scheduler._running == 1
+    assert scheduler._running == 0
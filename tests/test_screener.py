@@ -0,0 +1,46 @@
+import pandas as pd
+import pytest
+
+from data.screener import compile_expression, format_results
+
+
+def test_aliases_and_operators():
+    assert compile_expression("RSI < 30 and PE < 15 && 50D SMA > 200D SMA") == \
+        "rsi < 30 and pe_ratio < 15 and sma_50 > sma_200"
+    assert compile_expression("not (price => 1.5e3 || p/b =< 2)") == \
+        "not ( current_price >= 1.5e3 or pb_ratio <= 2 )"
+
+
+@pytest.mark.parametrize("expression", [
+    "__import__('os').system('ls') and rsi < 30",
+    "rsi.__class__ > 0",
+    "price.real > 10",
+    "rsi < @limit",
+    "rsi < 30; price > 1",
+    "rsi[0] < 30",
+])
+def test_rejects_code(expression):
+    with pytest.raises(ValueError):
+        compile_expression(expression)
+
+
+def test_rejects_unknown_field():
+    with pytest.raises(ValueError, match="Unknown field 'foo'"):
+        compile_expression("foo > 1")
+
+
+def test_requires_a_field():
+    with pytest.raises(ValueError, match="at least one field"):
+        compile_expression("1 < 2")
+
+
+def test_format_results_shows_screened_fields():
+    results = pd.DataFrame({
+        "symbol": ["TCS.NS"], "company": ["Tata Consultancy Services"], "current_price": [3900.5],
+        "high_52w": [4200.0], "low_52w": [3100.0], "sma_50": [3850.0], "sma_200": [3700.0],
+        "rsi": [28.4], "pe_ratio": [12.1], "beta": [0.7],
+    })
+    table = format_results(results, "RSI < 30 and PE < 15")
+    header = table.splitlines()[0].split()
+    assert header == ["symbol", "company", "current_price", "rsi", "pe_ratio"]
+    assert "Tata Consultancy Services" in table
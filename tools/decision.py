@@ -1,8 +1,9 @@
-from typing import List
+from typing import List, Optional
 from pydantic import BaseModel
 import json
 from utils.ollama import model  # Your raw model instance from commons.py
 from functools import lru_cache
+from utils.scheduler import llm_priority, ROUTER, SchedulerRejected
 
 
 class ToolDecision(BaseModel):
@@ -10,6 +11,7 @@ class ToolDecision(BaseModel):
     tools_needed: List[str]
     financial_query: str = None
     search_query: str
+    screen_query: Optional[str] = None
 
 
 @lru_cache(maxsize=256)  # Cache up to 256 unique queries
@@ -32,6 +34,16 @@ def get_tool_decision(query: str, use_cache: bool = True) -> dict:
     return select_tools(normalized_query)
 
 
+def _valid_screen(expression: str) -> bool:
+    from data.screener import compile_expression
+
+    try:
+        compile_expression(expression)
+        return True
+    except ValueError:
+        return False
+
+
 def select_tools(query: str) -> ToolDecision:
     """
     Enhanced tool selection with separate query optimization for each tool type.
@@ -40,6 +52,7 @@ def select_tools(query: str) -> ToolDecision:
     prompt = f"""Analyze this query and prepare optimized searches for:
     - financial_retriever: Optimize for document retrieval (fundamentals, financials)
     - web_search: Optimize for news/events search
+    - screener: Only for finding/ranking stocks across the market by metrics
     Only use the tools if aboslutely necessary.
     Respond EXACTLY with this JSON (no other text):
     {{
@@ -48,28 +61,40 @@ def select_tools(query: str) -> ToolDecision:
         "financial_query": "optimized terms for financial docs",
         "search_query": "optimized terms for online search"
     }}
+    Only when using the screener, add "screener" to tools_needed and a "screen_query" key
+    with a filter over RSI, PE, PB, EPS, price, 50D SMA, 200D SMA, 52W high, 52W low,
+    volatility, beta, market cap, dividend yield using < > and/or, e.g. "RSI < 30 and PE < 15"
     Query: {query}"""
     
     try:
-        response = model.invoke(prompt)
+        with llm_priority(ROUTER):
+            response = model.invoke(prompt)
         cleaned = response.strip().replace('```json', '').replace('```', '').strip()
         decision = json.loads(cleaned)
         
         # Validate and normalize
         tools = decision.get("tools_needed", [])
-        valid_tools = ["financial_retriever", "web_search"]
+        valid_tools = ["financial_retriever", "web_search", "screener"]
         
         # Default to original query if specific optimizations aren't provided
         financial_query = str(decision.get("financial_query", query))
         search_query = str(decision.get("search_query", query))
+        screen_query = decision.get("screen_query")
+        if screen_query and not _valid_screen(str(screen_query)):
+            screen_query = None  # Copied template text or a field we don't have
+        if not screen_query:
+            valid_tools.remove("screener")
         
         return ToolDecision(
             needs_retrieval=bool(decision.get("needs_retrieval", bool(tools))),
             tools_needed=[t for t in tools if t in valid_tools],
             financial_query=financial_query, 
-            search_query=search_query
+            search_query=search_query,
+            screen_query=str(screen_query) if screen_query else None
         )
         
+    except SchedulerRejected:
+        raise  # Not a real decision, so keep it out of the lru_cache
     except json.JSONDecodeError:
         return ToolDecision(
             needs_retrieval=False,
@@ -0,0 +1,145 @@
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, wait
+from typing import Dict, List, Optional
+
+from data.screener import screen, format_results
+from rag.rag_pipeline import retrieve_context
+from tools.decision import get_tool_decision, ToolDecision
+from tools.search_online import search_ddg, extract_article_text
+from utils.dedup import dedup_results, dedup_articles
+from utils.metrics import span, registry
+from utils.scheduler import SchedulerRejected
+
+TURN_DEADLINE = 60.0  # seconds for routing + all tools; search_ddg alone sleeps 30s
+MAX_WORKERS = 8
+
+TOOL_TIMEOUTS = registry.counter("fin_agent_tool_timeouts_total", "Tools dropped for missing the turn deadline")
+SPECULATION = registry.counter("fin_agent_speculative_retrieval_total", "Outcome of speculative retrieval")
+
+_pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="tools")
+
+
+def _submit(fn, *args):
+    # Run in a copy of the caller's context so spans land in the caller's trace
+    return _pool.submit(contextvars.copy_context().run, fn, *args)
+
+
+def _route(message: str, company: str) -> ToolDecision:
+    with span("tool_routing"):
+        return get_tool_decision(message, company)
+
+
+def _retrieve(query: str) -> str:
+    with span("retrieval"):
+        return retrieve_context(query)
+
+
+def _web_search(query: str) -> List[str]:
+    with span("ddg_search"):
+        search_results = search_ddg(f"{query}", 3)
+
+    with span("article_extraction"):
+        articles = dedup_articles([extract_article_text(result) for result in dedup_results(search_results)])
+
+    web_results = []
+    for article in articles:
+        if article:
+            excerpt = article["text"][:100].replace("\n", " ")
+            web_results.append(
+                f"- {article['title']}\n  Source: {article['url']}\n  Excerpt: {excerpt}..."
+            )
+    return web_results
+
+
+def _screen(expression: str) -> str:
+    from data.stockdata import market  # Company names for the symbols
+
+    with span("screener"):
+        try:
+            return f"Screen: {expression}\n" + format_results(screen(expression, market=market), expression)
+        except (ValueError, FileNotFoundError) as e:
+            return f"Screen '{expression}' could not be run: {e}"
+
+
+def _same_query(a: Optional[str], b: str) -> bool:
+    return (a or "").strip().lower() == b.strip().lower()
+
+
+def run_tools(message: str, company: str, deadline: float = TURN_DEADLINE) -> Dict:
+    """
+    Route the message and run the chosen tools under one deadline.
+
+    Retrieval over the local index is cheap, so it starts on the raw message while the
+    LLM router is still thinking. Once the router answers, the chosen tools run
+    concurrently; speculative work the router rejects is cancelled or discarded.
+    Tools that miss the deadline are skipped. If the LLM scheduler rejects the router,
+    the turn falls back to the speculative retrieval.
+
+    Returns {"decision", "finance", "news", "screen", "timed_out"}, where finance is the
+    retrieved text, news a list of formatted web results and screen the screener table
+    (each None when not run or timed out).
+    """
+    started = time.monotonic()
+
+    def remaining() -> float:
+        return max(0.0, deadline - (time.monotonic() - started))
+
+    router = _submit(_route, message, company)
+    speculative = _submit(_retrieve, message)
+
+    result = {"decision": None, "finance": None, "news": None, "screen": None, "timed_out": []}
+    futures = {}
+    try:
+        decision = router.result(timeout=remaining())
+    except TimeoutError:
+        speculative.cancel()
+        TOOL_TIMEOUTS.inc(tool="router")
+        result["timed_out"].append("router")
+        return result
+    except SchedulerRejected as e:
+        if e.reason == "cancelled":
+            speculative.cancel()
+            raise
+        # No model capacity for routing; answer from local documents alone
+        SPECULATION.inc(outcome="unrouted")
+        decision = None
+        futures["finance"] = speculative
+    result["decision"] = decision
+
+    tools_needed = decision.tools_needed if decision is not None else []
+    if decision is None:
+        pass  # Speculative retrieval already queued above
+    elif "financial_retriever" in tools_needed:
+        if _same_query(decision.financial_query, message):
+            SPECULATION.inc(outcome="used")
+            futures["finance"] = speculative
+        else:
+            # Kept as a fallback in case the optimized query misses the deadline
+            SPECULATION.inc(outcome="superseded")
+            futures["finance"] = _submit(_retrieve, decision.financial_query or message)
+    else:
+        SPECULATION.inc(outcome="discarded")
+        speculative.cancel()
+
+    if "web_search" in tools_needed:
+        futures["news"] = _submit(_web_search, decision.search_query or message)
+
+    if "screener" in tools_needed and decision.screen_query:
+        futures["screen"] = _submit(_screen, decision.screen_query)
+
+    done, _ = wait(futures.values(), timeout=remaining())
+    for name, future in futures.items():
+        if future in done and future.exception() is None:
+            result[name] = future.result()
+        elif future in done:
+            print(f"Tool '{name}' failed: {future.exception()}")
+        elif name == "finance" and future is not speculative and speculative.done() \
+                and speculative.exception() is None:
+            SPECULATION.inc(outcome="fallback")
+            result[name] = speculative.result()
+        else:
+            TOOL_TIMEOUTS.inc(tool=name)
+            result["timed_out"].append(name)
+
+    return result
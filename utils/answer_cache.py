@@ -0,0 +1,119 @@
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+SIMILARITY_THRESHOLD = 0.9  # Cosine similarity needed to reuse an answer
+CACHE_TTL = 60 * 60  # seconds
+MAX_ENTRIES = 256
+MIN_QUESTION_WORDS = 3  # Shorter messages ("why?", "and TCS?") depend on the conversation
+
+
+class SemanticAnswerCache:
+    """
+    Reuse answers for questions that mean the same thing.
+
+    Questions are embedded and compared by cosine similarity, but only against entries
+    with the same scope: the selected company plus a hash of the context injected into
+    the prompt. Entries expire after `ttl` seconds and the least recently used entry is
+    evicted once `max_entries` is reached.
+    """
+
+    def __init__(self, embed_fn: Callable[[str], List[float]], threshold: float = SIMILARITY_THRESHOLD,
+                 ttl: float = CACHE_TTL, max_entries: int = MAX_ENTRIES):
+        self.embed_fn = embed_fn
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def scope(company: str, context: Dict[str, str]) -> str:
+        parts = [company or "", context.get("finance", ""), context.get("news", "")]
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _normalize(question: str) -> str:
+        return re.sub(r"\s+", " ", question).strip().lower()
+
+    def _embed(self, question: str) -> Optional[np.ndarray]:
+        if len(question.split()) < MIN_QUESTION_WORDS:
+            return None
+        try:
+            vector = np.asarray(self.embed_fn(question), dtype=np.float32)
+        except Exception as e:
+            print(f"Answer cache embedding error: {str(e)}")
+            return None
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def _expire(self, now: float) -> None:
+        expired = [key for key, e in self._entries.items() if now - e["created"] > self.ttl]
+        for key in expired:
+            del self._entries[key]
+
+    def lookup(self, question: str, company: str, context: Dict[str, str]) -> Tuple[Optional[str], Optional[np.ndarray]]:
+        """
+        Cached answer for the question, or None. Also returns the question's embedding
+        (None if it wasn't computed) so a following store() doesn't embed it again.
+        """
+        question = self._normalize(question)
+        scope = self.scope(company, context)
+        now = time.time()
+
+        with self._lock:
+            # Exact repeats skip the embedding entirely
+            entry = self._entries.get((scope, question))
+            if entry and now - entry["created"] <= self.ttl:
+                self._entries.move_to_end((scope, question))
+                return entry["answer"], None
+
+            # So does a scope with nothing cached yet, e.g. the first question after new context
+            self._expire(now)
+            if not any(key[0] == scope for key in self._entries):
+                return None, None
+
+        vector = self._embed(question)
+        if vector is None:
+            return None, None
+
+        with self._lock:
+            candidates = [(key, e) for key, e in self._entries.items() if key[0] == scope]
+            if not candidates:
+                return None, vector
+
+            scores = np.stack([e["vector"] for _, e in candidates]) @ vector
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                return None, vector
+
+            key, entry = candidates[best]
+            self._entries.move_to_end(key)
+            return entry["answer"], vector
+
+    def store(self, question: str, company: str, context: Dict[str, str], answer: str,
+              vector: Optional[np.ndarray] = None) -> None:
+        """Cache an answer; pass the vector from lookup() to skip re-embedding the question"""
+        if not answer:
+            return
+        question = self._normalize(question)
+        if vector is None:
+            vector = self._embed(question)
+        if vector is None:
+            return
+
+        key = (self.scope(company, context), question)
+        with self._lock:
+            self._entries[key] = {"vector": vector, "answer": answer, "created": time.time()}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
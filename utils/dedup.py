@@ -0,0 +1,113 @@
+import hashlib
+import re
+from typing import Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+# Estimated Jaccard similarity above which two items count as the same story
+TITLE_SIMILARITY_THRESHOLD = 0.7
+BODY_SIMILARITY_THRESHOLD = 0.6
+BODY_CHARS = 5000  # Leading body text compared; enough to catch syndicated copies
+
+# Query parameters that only track the click, not which article is served
+TRACKING_PARAMS = {"fbclid", "gclid", "dclid", "msclkid", "yclid", "mc_cid", "mc_eid", "igshid",
+                   "ref", "ref_src", "cmpid", "ocid", "icid", "_ga"}
+
+NUM_PERMUTATIONS = 64
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+# Fixed (a, b) pairs for the universal hash family, derived deterministically
+# so signatures are stable across processes.
+_PERMUTATIONS = [
+    (
+        int.from_bytes(hashlib.blake2b(f"a{i}".encode(), digest_size=8).digest(), "big") % (_MERSENNE_PRIME - 1) + 1,
+        int.from_bytes(hashlib.blake2b(f"b{i}".encode(), digest_size=8).digest(), "big") % _MERSENNE_PRIME,
+    )
+    for i in range(NUM_PERMUTATIONS)
+]
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def _shingles(text: str, size: int) -> set:
+    """Word n-grams of the lowercased text; short texts fall back to single words"""
+    words = _WORD_RE.findall((text or "").lower())
+    if len(words) < size:
+        return set(words)
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def minhash(text: str, shingle_size: int = 3) -> Optional[List[int]]:
+    """Compute a MinHash signature for `text`, or None if it has no words"""
+    shingles = _shingles(text, shingle_size)
+    if not shingles:
+        return None
+
+    hashes = [
+        int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "big")
+        for s in shingles
+    ]
+    return [
+        min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+        for a, b in _PERMUTATIONS
+    ]
+
+
+def similarity(sig_a: List[int], sig_b: List[int]) -> float:
+    """Estimate Jaccard similarity from two MinHash signatures"""
+    return sum(x == y for x, y in zip(sig_a, sig_b)) / len(sig_a)
+
+
+def canonical_url(url: str) -> str:
+    """
+    Strip scheme, www., tracking parameters (utm_*, fbclid, ...) and trailing slash so
+    syndicated links compare equal. Other parameters are kept (sorted), since they often
+    select the article (article.php?id=...).
+    """
+    if not url:
+        return ""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    host = host[4:] if host.startswith("www.") else host
+    params = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    )
+    query = "?" + urlencode(params) if params else ""
+    return host + parts.path.lower().rstrip("/") + query
+
+
+def _dedup(items: List[Dict], key_text, threshold: float, shingle_size: int) -> List[Dict]:
+    kept = []
+    signatures = []
+    for item in items:
+        signature = minhash(key_text(item), shingle_size)
+        if signature is not None and any(similarity(signature, s) >= threshold for s in signatures):
+            continue
+        kept.append(item)
+        if signature is not None:
+            signatures.append(signature)
+    return kept
+
+
+def dedup_results(results: List[Dict], threshold: float = TITLE_SIMILARITY_THRESHOLD) -> List[Dict]:
+    """
+    Drop duplicate DDG search/news results before article extraction.
+    Exact matches on the canonical URL are removed first, then near-duplicate titles.
+    """
+    seen_urls = set()
+    unique = []
+    for result in results or []:
+        url = canonical_url(result.get("url") or result.get("href", ""))
+        if url and url in seen_urls:
+            continue
+        seen_urls.add(url)
+        unique.append(result)
+
+    # Titles are short, so compare word bigrams instead of trigrams
+    return _dedup(unique, lambda r: r.get("title", ""), threshold, shingle_size=2)
+
+
+def dedup_articles(articles: List[Dict], threshold: float = BODY_SIMILARITY_THRESHOLD) -> List[Dict]:
+    """Drop extracted articles whose body text is a near-duplicate of an earlier one"""
+    return _dedup(articles, lambda a: a.get("text", "")[:BODY_CHARS], threshold, shingle_size=3)
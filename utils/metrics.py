@@ -0,0 +1,234 @@
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = int(os.environ.get("FIN_AGENT_METRICS_PORT", "9464"))
+TRACE_LOG_FILE = os.environ.get("FIN_AGENT_TRACE_LOG")  # Per-request JSONL traces, off when unset
+
+# Request stages range from sub-millisecond cache hits to minute-long generations
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+
+
+def _label_key(labels: Dict[str, str]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: Tuple[Tuple[str, str], ...], extra: Dict[str, str] = None) -> str:
+    pairs = list(key) + [(k, str(v)) for k, v in (extra or {}).items()]
+    if not pairs:
+        return ""
+    return "{" + ",".join(
+        '{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"')) for k, v in pairs
+    ) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, description: str, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[tuple, list] = {}  # key -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.setdefault(key, [0] * (len(self.buckets) + 2))
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_format_labels(key, {'le': bound})} {cumulative}")
+                lines.append(f"{self.name}_bucket{_format_labels(key, {'le': '+Inf'})} {series[-1]}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {series[-2]}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {series[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, *args):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = cls(name, *args)
+            return self._metrics[name]
+
+    def counter(self, name: str, description: str) -> Counter:
+        return self._get_or_create(Counter, name, description)
+
+    def histogram(self, name: str, description: str, buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, description, buckets)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(line for metric in metrics for line in metric.render()) + "\n"
+
+
+registry = Registry()
+
+STAGE_SECONDS = registry.histogram("fin_agent_stage_seconds", "Wall time spent in each request-path stage")
+STAGE_ERRORS = registry.counter("fin_agent_stage_errors_total", "Stages that raised an exception")
+OLLAMA_TOKENS = registry.histogram("fin_agent_ollama_tokens", "Tokens per Ollama call", TOKEN_BUCKETS)
+OLLAMA_SECONDS = registry.histogram("fin_agent_ollama_seconds", "Ollama-reported durations per call")
+
+# Spans recorded by the request currently running in this context, if any
+_current_trace: ContextVar[Optional[dict]] = ContextVar("fin_agent_trace", default=None)
+_trace_lock = threading.Lock()
+
+
+@contextmanager
+def span(stage: str, **labels):
+    """Time a block of work and record it under `stage`"""
+    start = time.perf_counter()
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        STAGE_SECONDS.observe(duration, stage=stage, **labels)
+        if error:
+            STAGE_ERRORS.inc(stage=stage)
+
+        trace_record = _current_trace.get()
+        if trace_record is not None:
+            trace_record["spans"].append({
+                "stage": stage,
+                "offset": round(start - trace_record.get("_start", start), 6),
+                "duration": round(duration, 6),
+                "error": error,
+                **labels,
+            })
+
+
+def timed(stage: str):
+    """Decorator form of `span`"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def trace(name: str, **attrs):
+    """
+    Group every span inside the block into one request trace.
+    The whole block is also recorded as a stage named `name`, and the trace is
+    appended to TRACE_LOG_FILE when it is set.
+    """
+    record = {"trace_id": uuid.uuid4().hex, "name": name, "timestamp": time.time(),
+              "spans": [], "_start": time.perf_counter(), **attrs}
+    token = _current_trace.set(record)
+    try:
+        with span(name):
+            yield record
+    finally:
+        _current_trace.reset(token)
+        record["duration"] = round(time.perf_counter() - record.pop("_start"), 6)
+        if TRACE_LOG_FILE:
+            line = json.dumps(record, default=str) + "\n"
+            with _trace_lock:
+                with open(TRACE_LOG_FILE, "a", encoding="utf-8") as f:
+                    f.write(line)
+
+
+def record_ollama_stats(data: dict, endpoint: str) -> None:
+    """Record token counts and eval durations from an Ollama response body"""
+    for field, kind in [("prompt_eval_count", "prompt"), ("eval_count", "completion")]:
+        if data.get(field) is not None:
+            OLLAMA_TOKENS.observe(data[field], endpoint=endpoint, kind=kind)
+
+    # Ollama reports durations in nanoseconds
+    for field, phase in [("load_duration", "load"), ("prompt_eval_duration", "prefill"),
+                         ("eval_duration", "decode"), ("total_duration", "total")]:
+        if data.get(field) is not None:
+            OLLAMA_SECONDS.observe(data[field] / 1e9, endpoint=endpoint, phase=phase)
+
+    trace_record = _current_trace.get()
+    if trace_record is not None:
+        trace_record.setdefault("ollama", []).append({
+            "endpoint": endpoint,
+            **{k: data.get(k) for k in ("prompt_eval_count", "eval_count", "prompt_eval_duration",
+                                        "eval_duration", "total_duration")},
+        })
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Keep scrapes out of the console
+
+
+def start_metrics_server(port: int = METRICS_PORT, host: str = METRICS_HOST) -> Optional[ThreadingHTTPServer]:
+    """
+    Serve /metrics in Prometheus text format from a daemon thread.
+    Port 0 disables the endpoint. If the port is taken (e.g. by another worker), the
+    error is logged and the app keeps running without an endpoint of its own.
+    """
+    if not port:
+        return None
+    try:
+        server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError as e:
+        print(f"Metrics endpoint disabled, could not bind {host}:{port}: {e}")
+        return None
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
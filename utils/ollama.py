@@ -1,9 +1,11 @@
 from langchain.llms.base import LLM
 from pydantic import Field, ValidationError
-from typing import Optional, List
+from typing import Optional, List, Dict
 import json
 import requests
 import logging
+from utils.metrics import span, record_ollama_stats
+from utils.scheduler import scheduler, SchedulerRejected
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +18,12 @@ class OllamaLLM(LLM):
     temperature: float = Field(default=0.2, ge=0, le=1, 
                               description="Model temperature")
     max_tokens: int = Field(default=1000, ge=1)
+    chat_url: str = Field(default="http://localhost:11434/api/chat",
+                          description="Chat endpoint URL, used by chat()")
+    num_ctx: int = Field(default=8192, ge=512,
+                         description="Context window for chat(); Ollama truncates (and drops its cache) past it")
+    keep_alive: str = Field(default="30m",
+                            description="How long Ollama keeps the model and its KV cache loaded")
     session: requests.Session = Field(default_factory=requests.Session, 
                                      exclude=True)
 
@@ -38,24 +46,29 @@ class OllamaLLM(LLM):
         }
 
         try:
-            response = self.session.post(
-                self.base_url,
-                json={k: v for k, v in payload.items() if v is not None},
-                headers={"Content-Type": "application/json"},
-                timeout= 600
-            )
+            # Waits for a slot at the caller's priority; SchedulerRejected propagates
+            with scheduler.slot(), span("ollama_generate"):
+                response = self.session.post(
+                    self.base_url,
+                    json={k: v for k, v in payload.items() if v is not None},
+                    headers={"Content-Type": "application/json"},
+                    timeout= 600
+                )
             response.raise_for_status()
 
             # Handle both JSON and streaming responses
             if "application/json" in response.headers.get("Content-Type", ""):
-                return response.json().get("response", "")
+                data = response.json()
+                record_ollama_stats(data, "generate")
+                return data.get("response", "")
 
-            return "".join(
-                json.loads(line).get("response", "")
-                for line in response.text.splitlines()
-                if line.strip()
-            )
+            chunks = [json.loads(line) for line in response.text.splitlines() if line.strip()]
+            if chunks:
+                record_ollama_stats(chunks[-1], "generate")  # Final chunk carries the stats
+            return "".join(chunk.get("response", "") for chunk in chunks)
 
+        except SchedulerRejected:
+            raise
         except requests.HTTPError as e:
             logger.error(f"Ollama API HTTP Error: {e.response.text}")
             return ""
@@ -69,6 +82,58 @@ class OllamaLLM(LLM):
             logger.error(f"Unexpected error: {str(e)}")
             return ""
 
+    def chat(self, messages: List[Dict[str, str]], stop: Optional[List[str]] = None) -> str:
+        """
+        Send role/content messages to Ollama's /api/chat.
+        Unlike invoke(), the messages are not flattened into one prompt, so the model's
+        chat template is applied server-side and an unchanged prefix (system prompt and
+        earlier turns) can be served from Ollama's KV cache.
+        """
+        payload = {
+            "model": self.model_name,
+            "messages": messages,
+            "stream": False,
+            "keep_alive": self.keep_alive,
+            "options": {
+                "temperature": self.temperature,
+                "stop": stop if stop else [],
+                "num_predict": self.max_tokens,
+                "num_ctx": self.num_ctx,
+            }
+        }
+
+        try:
+            with scheduler.slot(), span("ollama_chat"):
+                response = self.session.post(
+                    self.chat_url,
+                    json=payload,
+                    headers={"Content-Type": "application/json"},
+                    timeout=600
+                )
+            response.raise_for_status()
+
+            if "application/json" in response.headers.get("Content-Type", ""):
+                data = response.json()
+                record_ollama_stats(data, "chat")
+                return data.get("message", {}).get("content", "")
+
+            chunks = [json.loads(line) for line in response.text.splitlines() if line.strip()]
+            if chunks:
+                record_ollama_stats(chunks[-1], "chat")
+            return "".join(chunk.get("message", {}).get("content", "") for chunk in chunks)
+
+        except SchedulerRejected:
+            raise
+        except requests.HTTPError as e:
+            logger.error(f"Ollama API HTTP Error: {e.response.text}")
+            return ""
+        except (requests.RequestException, json.JSONDecodeError) as e:
+            logger.error(f"Ollama API error: {str(e)}")
+            return ""
+        except Exception as e:
+            logger.error(f"Unexpected error: {str(e)}")
+            return ""
+
     @property
     def _identifying_params(self) -> dict:
         """Get identifying parameters for caching."""
@@ -0,0 +1,152 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from utils.metrics import registry
+
+# Priority classes, lower runs first
+INTERACTIVE = 0  # Chat answers a user is waiting on
+ROUTER = 1  # Tool routing for a chat turn
+BACKGROUND = 2  # News summaries for "Fetch Data"
+PRIORITY_NAMES = {INTERACTIVE: "interactive", ROUTER: "router", BACKGROUND: "background"}
+
+# Keep in step with the Ollama server's OLLAMA_NUM_PARALLEL; anything above it only
+# queues inside Ollama, where priorities no longer apply
+LLM_CONCURRENCY = int(os.environ.get("OLLAMA_NUM_PARALLEL", "1"))
+# Requests allowed to wait per class before new ones are rejected outright
+QUEUE_LIMITS = {INTERACTIVE: 16, ROUTER: 16, BACKGROUND: 8}
+# Longest a request may wait for a slot (None waits indefinitely)
+QUEUE_TIMEOUTS = {INTERACTIVE: None, ROUTER: 30.0, BACKGROUND: 60.0}
+CANCEL_POLL_INTERVAL = 0.1
+
+QUEUE_SECONDS = registry.histogram("fin_agent_llm_queue_seconds", "Time LLM requests waited for a slot")
+REJECTED = registry.counter("fin_agent_llm_rejected_total", "LLM requests rejected before running")
+
+_priority: ContextVar[int] = ContextVar("fin_agent_llm_priority", default=INTERACTIVE)
+_cancel_event: ContextVar[Optional[threading.Event]] = ContextVar("fin_agent_llm_cancel", default=None)
+
+
+class SchedulerRejected(Exception):
+    """The request was not run: its queue was full, it waited too long, or it was cancelled"""
+
+    def __init__(self, priority: int, reason: str):
+        super().__init__(f"LLM {PRIORITY_NAMES[priority]} request rejected ({reason})")
+        self.priority = priority
+        self.reason = reason
+
+
+@contextmanager
+def llm_priority(priority: int):
+    """Run LLM calls made inside the block (and in tasks copied from its context) at `priority`"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+@contextmanager
+def cancel_on(event: threading.Event):
+    """Drop queued LLM calls made inside the block once `event` is set"""
+    token = _cancel_event.set(event)
+    try:
+        yield
+    finally:
+        _cancel_event.reset(token)
+
+
+class LLMScheduler:
+    """
+    Admission control in front of the shared Ollama model.
+
+    At most `concurrency` requests run at once. Waiting requests are granted slots
+    strictly by priority class, then arrival order. Each class has a bounded queue, so
+    a burst of background work is rejected quickly instead of piling up behind chat.
+    """
+
+    def __init__(self, concurrency: int = LLM_CONCURRENCY, queue_limits: Dict[int, int] = None,
+                 queue_timeouts: Dict[int, Optional[float]] = None):
+        self.concurrency = max(1, concurrency)
+        self.queue_limits = queue_limits or QUEUE_LIMITS
+        self.queue_timeouts = queue_timeouts or QUEUE_TIMEOUTS
+        self._running = 0
+        self._queue = []  # heap of (priority, sequence, grant event)
+        self._queued = {priority: 0 for priority in PRIORITY_NAMES}
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+    def _reject(self, priority: int, reason: str):
+        REJECTED.inc(priority=PRIORITY_NAMES[priority], reason=reason)
+        return SchedulerRejected(priority, reason)
+
+    def _acquire(self, priority: int, cancel: Optional[threading.Event]) -> None:
+        with self._lock:
+            if self._running < self.concurrency and not self._queue:
+                self._running += 1
+                QUEUE_SECONDS.observe(0.0, priority=PRIORITY_NAMES[priority])
+                return
+            if self._queued[priority] >= self.queue_limits[priority]:
+                raise self._reject(priority, "queue_full")
+            granted = threading.Event()
+            entry = (priority, next(self._sequence), granted)
+            heapq.heappush(self._queue, entry)
+            self._queued[priority] += 1
+
+        start = time.monotonic()
+        timeout = self.queue_timeouts.get(priority)
+        reason = None
+        while not granted.wait(CANCEL_POLL_INTERVAL):
+            if cancel is not None and cancel.is_set():
+                reason = "cancelled"
+            elif timeout is not None and time.monotonic() - start > timeout:
+                reason = "timeout"
+            else:
+                continue
+            with self._lock:
+                if granted.is_set():
+                    break  # Granted while giving up; take the slot after all
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+                self._queued[priority] -= 1
+            raise self._reject(priority, reason)
+
+        QUEUE_SECONDS.observe(time.monotonic() - start, priority=PRIORITY_NAMES[priority])
+
+    def _release(self) -> None:
+        with self._lock:
+            if self._queue:
+                # Hand the slot straight to the next waiter; _running is unchanged
+                priority, _, granted = heapq.heappop(self._queue)
+                self._queued[priority] -= 1
+                granted.set()
+            else:
+                self._running -= 1
+
+    @contextmanager
+    def slot(self, priority: Optional[int] = None, cancel: Optional[threading.Event] = None):
+        """
+        Hold one model slot for the block. Priority and cancellation default to the
+        caller's llm_priority/cancel_on context. Raises SchedulerRejected when the
+        request is not admitted.
+        """
+        priority = _priority.get() if priority is None else priority
+        cancel = _cancel_event.get() if cancel is None else cancel
+        if cancel is not None and cancel.is_set():
+            raise self._reject(priority, "cancelled")
+        self._acquire(priority, cancel)
+        try:
+            yield
+        finally:
+            self._release()
+
+    def queue_depths(self) -> Dict[str, int]:
+        with self._lock:
+            return {PRIORITY_NAMES[p]: count for p, count in self._queued.items()}
+
+
+scheduler = LLMScheduler()
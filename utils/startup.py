@@ -0,0 +1,81 @@
+"""
+Cold-start profiling for gradio_app.py.
+
+    python gradio_app.py --profile-startup
+
+Runs the app once under `python -X importtime` in probe mode: it builds the UI,
+starts serving, fetches the page once and exits. Reports time to first render
+(from process spawn until the page is served) and import time per top-level package.
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict
+
+STARTUP_BUDGET = float(os.environ.get("FIN_AGENT_STARTUP_BUDGET", "10"))  # seconds to first render
+PROBE_FLAG = "--startup-probe"
+READY_MARKER = "FIN_AGENT_STARTUP "
+
+
+def parse_importtime(stderr: str) -> Dict[str, float]:
+    """Seconds of import time per top-level package from `-X importtime` output"""
+    totals = defaultdict(float)
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        try:
+            self_us, _, name = line[len("import time:"):].split("|")
+            totals[name.strip().split(".")[0]] += int(self_us) / 1e6
+        except ValueError:
+            continue  # Header line
+    return dict(totals)
+
+
+def probe(demo) -> None:
+    """Child side: serve the UI, fetch it once, report timestamps and shut down"""
+    import requests
+
+    demo.launch(prevent_thread_lock=True, quiet=True)
+    launched = time.time()
+    requests.get(demo.local_url, timeout=60).raise_for_status()
+    rendered = time.time()
+    print(READY_MARKER + json.dumps({"launched_at": launched, "rendered_at": rendered}), flush=True)
+    demo.close()
+
+
+def profile_startup(script: str, timeout: float = 300) -> dict:
+    """Spawn `script` in probe mode and collect its startup profile"""
+    started = time.time()
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", script, PROBE_FLAG],
+        cwd=os.path.dirname(os.path.abspath(script)), capture_output=True, text=True, timeout=timeout,
+    )
+    ready = next((json.loads(line[len(READY_MARKER):]) for line in process.stdout.splitlines()
+                  if line.startswith(READY_MARKER)), None)
+    if ready is None:
+        raise RuntimeError(f"{script} did not reach first render:\n{process.stderr[-2000:]}")
+
+    imports = parse_importtime(process.stderr)
+    return {
+        "first_render_s": ready["rendered_at"] - started,
+        "launch_s": ready["launched_at"] - started,
+        "import_s": sum(imports.values()),
+        "imports": imports,
+        "budget_s": STARTUP_BUDGET,
+    }
+
+
+def format_report(result: dict, top: int = 20) -> str:
+    lines = [
+        f"time to first render {result['first_render_s']:.2f}s (budget {result['budget_s']:.1f}s)",
+        f"server up after      {result['launch_s']:.2f}s",
+        f"imports              {result['import_s']:.2f}s",
+        "",
+        f"{'package':<30} {'import s':>9}",
+    ]
+    ranked = sorted(result["imports"].items(), key=lambda item: item[1], reverse=True)
+    lines += [f"{name:<30} {seconds:>9.3f}" for name, seconds in ranked[:top]]
+    return "\n".join(lines)
@@ -1,57 +1,268 @@
 from utils.ollama import model
-from typing import Optional
+from utils.scheduler import llm_priority, BACKGROUND, SchedulerRejected
+from typing import Optional, List, Dict
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+
+# On-disk cache for LLM summaries, keyed by company + content hash
+SUMMARY_CACHE_DIR = os.path.join("cache", "summaries")
+SUMMARY_CACHE_TTL = 6 * 60 * 60  # seconds
+SUMMARY_CACHE_SWEEP_INTERVAL = 10 * 60  # seconds between deletions of expired entries
+ARTICLE_CHARS = 1000  # Article text fed to the per-article prompt
+POINTS_PER_ARTICLE = 2
+MAX_POINTS = 5
+
+
+def _normalize(text: str) -> str:
+    """Lowercase and collapse whitespace so trivial formatting changes still hit the cache"""
+    return re.sub(r"\s+", " ", text or "").strip().lower()
+
+
+def _hash(*parts: str) -> str:
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+def _cache_path(key: str) -> str:
+    return os.path.join(SUMMARY_CACHE_DIR, key[:2], f"{key}.json")
+
+
+def _cache_get(key: str) -> Optional[str]:
+    path = _cache_path(key)
+    try:
+        with open(path, "r") as f:
+            entry = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+    if time.time() - entry.get("created", 0) > SUMMARY_CACHE_TTL:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+    return entry.get("summary")
+
+
+_last_sweep = 0.0
+_sweep_lock = threading.Lock()
+
+
+def _sweep_cache() -> None:
+    """Delete expired entries (and leftover temp files); entries never read again would otherwise stay"""
+    global _last_sweep
+    now = time.time()
+    with _sweep_lock:
+        if now - _last_sweep < SUMMARY_CACHE_SWEEP_INTERVAL:
+            return
+        _last_sweep = now
+
+    for root, _, files in os.walk(SUMMARY_CACHE_DIR):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                # Entries are written once, so the file time is their creation time
+                if now - os.path.getmtime(path) > SUMMARY_CACHE_TTL:
+                    os.remove(path)
+            except OSError:
+                pass
+
+
+def _cache_put(key: str, summary: str) -> None:
+    path = _cache_path(key)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a unique temp file first so concurrent readers never see a partial entry
+        # and concurrent writers of the same key don't share one
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump({"created": time.time(), "summary": summary}, f)
+            os.replace(tmp_path, path)
+        except OSError:
+            os.remove(tmp_path)
+            raise
+    except OSError as e:
+        print(f"Summary cache write failed: {str(e)}")
+    _sweep_cache()
+
+
+def _article_key(article: Dict, company: str) -> str:
+    content = _normalize(article.get("title", "")) + "\n" + _normalize(article.get("text", "")[:ARTICLE_CHARS])
+    return _hash("article", _normalize(company), content)
+
+
+def _extract_bullets(response: str, limit: int) -> List[str]:
+    """Collect '•' bullets from a model response, joining wrapped lines"""
+    # Prompts are seeded with the first bullet, so the reply usually continues it
+    response = response.lstrip()
+    if response and not response.startswith('•'):
+        response = '• ' + response
+
+    bullets = []
+    current_bullet = ""
+
+    for line in response.split('\n'):
+        stripped = line.strip()
+
+        if stripped.startswith('•'):
+            if current_bullet:
+                bullets.append(current_bullet)
+            current_bullet = stripped
+        elif current_bullet and stripped:
+            current_bullet += " " + stripped
+
+        if len(bullets) >= limit:
+            break
+
+    if current_bullet and len(bullets) < limit:
+        bullets.append(current_bullet)
+
+    return bullets[:limit]
+
+
+def _extractive_points(news_text: str) -> str:
+    """Leading sentences as bullets, used when the model can't be reached"""
+    sentences = [s.strip() for s in news_text.split('. ')[:5] if s.strip()]
+    return "\n".join([f"• {s}" for s in sentences]) or "• News summary unavailable"
 
 
 def summarize_news(news_text: str,company: str) -> str:
     """Generate concise financial news bullet points with reliable extraction"""
     if not news_text.strip():
         return "• No recent news available"
-    
+
+    cache_key = _hash("news", _normalize(company), _normalize(news_text[:3000]))
+    cached = _cache_get(cache_key)
+    if cached:
+        return cached
+
     # Focused prompt for financial news
     prompt = f"""Extract exactly 5 key points from these news articles:
-    
+
     Requirements:
     - Each point must start with •
-    - Summarize finacial highlights 
+    - Summarize finacial highlights
     - 15 words maximum per point
     - Ensure each point is a complete thought
-    
+
     Company: {company}
 
     News Content:
     {news_text[:3000]}
-    
+
     Extracted Financial Points:
     •"""  # Seed with first bullet
 
     try:
-        response = model.invoke(prompt)
-        bullets = []
-        current_bullet = ""
-
-        for line in response.split('\n'):
-            stripped = line.strip()
-            
-            if stripped.startswith('•'):
-                if current_bullet:
-                    bullets.append(current_bullet)
-                current_bullet = stripped
-            elif current_bullet and stripped:
-                current_bullet += " " + stripped
-            
-            if len(bullets) >= 5:
-                break
-
-        if current_bullet and len(bullets) < 5:
-            bullets.append(current_bullet)
+        # Summaries run behind chat and routing in the LLM scheduler
+        with llm_priority(BACKGROUND):
+            response = model.invoke(prompt)
+        bullets = _extract_bullets(response, MAX_POINTS)
 
         if not bullets:
             return "• No financial highlights available"
 
-        return "\n".join(bullets[:5])
-    
+        summary = "\n".join(bullets)
+        _cache_put(cache_key, summary)
+        return summary
+
     except Exception as e:
         print(f"Summarization error: {str(e)}")
         # Provide fallback with raw text highlights
-        sentences = [s.strip() for s in news_text.split('. ')[:5] if s.strip()]
-        return "\n".join([f"• {s}" for s in sentences]) or "• News summary unavailable"
\ No newline at end of file
+        return _extractive_points(news_text)
+
+
+def summarize_article(article: Dict, company: str) -> List[str]:
+    """
+    Summarize a single article into at most POINTS_PER_ARTICLE bullets.
+    Results are cached per article so they can be reused across article sets.
+    """
+    cache_key = _article_key(article, company)
+    cached = _cache_get(cache_key)
+    if cached:
+        return cached.split("\n")
+
+    text = article.get("text", "")[:ARTICLE_CHARS]
+    if not text.strip():
+        return []
+
+    prompt = f"""Extract up to {POINTS_PER_ARTICLE} key points from this news article:
+
+    Requirements:
+    - Each point must start with •
+    - Summarize finacial highlights
+    - 15 words maximum per point
+    - Ensure each point is a complete thought
+
+    Company: {company}
+
+    Title: {article.get("title", "")}
+    Content:
+    {text}
+
+    Extracted Financial Points:
+    •"""
+
+    try:
+        with llm_priority(BACKGROUND):
+            bullets = _extract_bullets(model.invoke(prompt), POINTS_PER_ARTICLE)
+    except SchedulerRejected:
+        raise
+    except Exception as e:
+        print(f"Summarization error: {str(e)}")
+        return []
+
+    # Empty replies usually mean Ollama was unreachable, so don't pin them in the cache
+    if bullets:
+        _cache_put(cache_key, "\n".join(bullets))
+    return bullets
+
+
+def summarize_articles(articles: List[Dict], company: str) -> str:
+    """
+    Summarize a set of extracted articles.
+
+    The whole set is cached by company + a hash of the normalized articles. On a miss,
+    each article is summarized on its own (and cached), then the per-article bullets are
+    merged round-robin, so one new article in a set only costs one small generation.
+    """
+    articles = [a for a in articles if a.get("text", "").strip()]
+    if not articles:
+        return "• No recent news available"
+
+    # Sort the article hashes so the set key does not depend on result ordering
+    article_keys = sorted(_article_key(a, company) for a in articles)
+    set_key = _hash("articles", _normalize(company), *article_keys)
+    cached = _cache_get(set_key)
+    if cached:
+        return cached
+
+    news_text = "\n".join(f"Title:{a.get('title', '')}\n text:{a['text'][:500]}" for a in articles)
+    try:
+        per_article = [summarize_article(article, company) for article in articles]
+    except SchedulerRejected as e:
+        # The model is busy with interactive work; degrade instead of queueing more
+        print(f"Summarization skipped: {e}")
+        return _extractive_points(news_text)
+
+    merged = []
+    for rank in range(POINTS_PER_ARTICLE):
+        for bullets in per_article:
+            if rank < len(bullets) and len(merged) < MAX_POINTS:
+                merged.append(bullets[rank])
+
+    if not merged:
+        # Nothing usable from the model; fall back to the single-shot prompt
+        return summarize_news(news_text, company)
+
+    summary = "\n".join(merged)
+    # A partial summary (some article got an empty reply) is served but not cached, so the
+    # next fetch retries the missing articles instead of reusing it for SUMMARY_CACHE_TTL
+    if all(per_article):
+        _cache_put(set_key, summary)
+    return summary
@@ -1,20 +1,157 @@
+import atexit
+import glob
+import gzip
 import json
-from datetime import datetime
 import os
+import queue
+import shutil
+import threading
+from datetime import datetime
+from typing import Dict, Iterator, List
+
+TRANSCRIPT_FILE = "transcripts.jsonl"
+LEGACY_TRANSCRIPT_FILE = "transcripts.json"  # Old single JSON array format, read-only now
+
+MAX_FILE_BYTES = 50 * 1024 * 1024  # Rotate once the active file grows past this
+FLUSH_INTERVAL = 1.0  # Seconds between background flushes
+FLUSH_BATCH_SIZE = 100  # Flush early once this many entries are waiting
+FLUSH_TIMEOUT = 10.0  # Longest flush() waits for the writer thread
+
+
+class TranscriptWriter:
+    """
+    Append-only JSONL transcript sink.
+
+    `write` only puts the entry on a queue; a daemon thread serializes entries and
+    appends them in batches, so logging cost on the request path does not depend on
+    the size of the log. The active file is rotated (and gzipped) when it exceeds
+    `max_bytes` or when the date changes.
+    """
+
+    def __init__(self, path: str = TRANSCRIPT_FILE, max_bytes: int = MAX_FILE_BYTES,
+                 flush_interval: float = FLUSH_INTERVAL, batch_size: int = FLUSH_BATCH_SIZE):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._queue: "queue.Queue[Dict]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def write(self, entry: Dict) -> None:
+        self._ensure_started()
+        self._queue.put(entry)
+
+    def flush(self, timeout: float = FLUSH_TIMEOUT) -> bool:
+        """
+        Block until everything queued so far is on disk. The writer thread does the
+        writing (entries stay in order); this only queues a marker and waits for it.
+        Returns False if the writer did not confirm within `timeout` seconds.
+        """
+        if self._thread is None:
+            return True  # Nothing was ever written
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def _ensure_started(self) -> None:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="transcript-writer", daemon=True)
+                    self._thread.start()
+                    atexit.register(self.flush)
+
+    def _run(self) -> None:
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            batch, flushed = [], []
+            while True:
+                if isinstance(item, threading.Event):
+                    flushed.append(item)  # Flush marker: set once everything before it is written
+                else:
+                    batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if batch:
+                self._write(batch)
+            for done in flushed:
+                done.set()
+
+    def _write(self, batch: List[Dict]) -> None:
+        lines = "".join(json.dumps(entry, default=str) + "\n" for entry in batch)
+        try:
+            self._rotate_if_needed()
+            # One append per batch keeps lines intact across processes
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(lines)
+        except OSError as e:
+            print(f"Transcript write failed: {str(e)}")
+
+    def _rotate_if_needed(self) -> None:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+
+        modified = datetime.fromtimestamp(stat.st_mtime)
+        if stat.st_size < self.max_bytes and modified.date() == datetime.now().date():
+            return
+
+        base, ext = os.path.splitext(self.path)
+        rotated = f"{base}-{modified.strftime('%Y%m%d-%H%M%S-%f')}-{os.getpid()}{ext}"
+        try:
+            os.rename(self.path, rotated)
+        except FileNotFoundError:
+            return  # Another process rotated it first
+
+        with open(rotated, "rb") as src, gzip.open(rotated + ".gz", "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(rotated)
+
+
+_writer = TranscriptWriter()
+
+
+def iter_transcripts(path: str = TRANSCRIPT_FILE, include_rotated: bool = True) -> Iterator[Dict]:
+    """Stream transcript entries oldest first, without loading the whole log"""
+    if os.path.exists(LEGACY_TRANSCRIPT_FILE):
+        with open(LEGACY_TRANSCRIPT_FILE, "r") as f:
+            yield from json.load(f)
+
+    base, ext = os.path.splitext(path)
+    files = sorted(glob.glob(f"{base}-*{ext}.gz")) if include_rotated else []
+    if os.path.exists(path):
+        files.append(path)
+
+    for file_path in files:
+        opener = gzip.open if file_path.endswith(".gz") else open
+        with opener(file_path, "rt", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Partially written line from a crashed process
 
-TRANSCRIPT_FILE = "transcripts.json"
 
 def load_transcripts():
-    if os.path.exists(TRANSCRIPT_FILE):
-        with open(TRANSCRIPT_FILE, "r") as f:
-            return json.load(f)
-    return []
+    _writer.flush()
+    return list(iter_transcripts())
 
 def save_transcript(entry):
-    transcripts = load_transcripts()
-    transcripts.append(entry)
-    with open(TRANSCRIPT_FILE, "w") as f:
-        json.dump(transcripts, f, indent=2)
+    _writer.write(entry)
 
 
 
@@ -26,4 +163,4 @@ def log_interaction(user_message, response, retrieved_context,tools_used):
         "agent_response": response,
         "tools_used": tools_used
     }
-    save_transcript(transcript_entry)
\ No newline at end of file
+    save_transcript(transcript_entry)